@@ -0,0 +1,77 @@
+import os
+import pickle
+import threading
+from array import array
+from typing import Dict, List, Set, Tuple
+from urllib.robotparser import RobotFileParser
+
+
+CHECKPOINT_FILE: str = "checkpoint.pkl"
+
+
+class CrawlState:
+    count: int
+    frontier: List[Tuple[int, str]]
+    visited: Set[int]
+    domains: Dict[str, Tuple[float, RobotFileParser]]
+    warc_file_index: int
+    fingerprints: array
+
+    def __init__(
+        self,
+        count: int,
+        frontier: List[Tuple[int, str]],
+        visited: Set[int],
+        domains: Dict[str, Tuple[float, RobotFileParser]],
+        warc_file_index: int,
+        fingerprints: array,
+    ) -> None:
+        self.count = count
+        self.frontier = frontier
+        self.visited = visited
+        self.domains = domains
+        self.warc_file_index = warc_file_index
+        self.fingerprints = fingerprints
+
+
+class Checkpointer:
+    path: str
+    lock: threading.Lock
+
+    def __init__(self, corpus_dir: str) -> None:
+        self.path = os.path.join(corpus_dir, CHECKPOINT_FILE)
+        self.lock = threading.Lock()
+
+    def save(self, state: CrawlState, block: bool = False) -> None:
+        """Write a checkpoint in the background, skipping it if one is still being written.
+
+        With `block`, wait for the write in progress instead, then write this
+        checkpoint before returning.
+        """
+        if block:
+            self.lock.acquire()
+            self._write(state)
+            return
+
+        if not self.lock.acquire(blocking=False):
+            return
+
+        threading.Thread(target=self._write, args=(state,), daemon=True).start()
+
+    def _write(self, state: CrawlState) -> None:
+        try:
+            # written aside and renamed so a crash never leaves a torn checkpoint
+            tmp_path = f"{self.path}.tmp"
+            with open(file=tmp_path, mode="wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+        finally:
+            self.lock.release()
+
+    def load(self) -> CrawlState | None:
+        """Return the last checkpoint, or None if there is none."""
+        if not os.path.exists(self.path):
+            return None
+
+        with open(file=self.path, mode="rb") as f:
+            return pickle.load(f)
@@ -0,0 +1,44 @@
+import shutil
+import tempfile
+import threading
+import unittest
+from array import array
+from checkpoint_utils import Checkpointer, CrawlState
+
+
+def state(count):
+    return CrawlState(count=count, frontier=[(0, "http://example.com/")], visited={1, 2},
+                      domains={}, warc_file_index=1, fingerprints=array("Q", [7]))
+
+
+class TestCheckpointer(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.checkpointer = Checkpointer(corpus_dir=self.dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_no_checkpoint(self):
+        self.assertIsNone(self.checkpointer.load())
+
+    def test_save_skips_while_a_write_is_in_progress(self):
+        self.checkpointer.lock.acquire()  # stands in for a background write
+        self.checkpointer.save(state(1))
+        self.checkpointer.lock.release()
+        self.assertIsNone(self.checkpointer.load())
+
+    def test_blocking_save_waits_for_the_write_in_progress(self):
+        self.checkpointer.lock.acquire()
+        timer = threading.Timer(0.1, self.checkpointer.lock.release)
+        timer.start()
+        self.checkpointer.save(state(2), block=True)
+        timer.join()
+        loaded = self.checkpointer.load()
+        self.assertEqual((loaded.count, loaded.visited, list(loaded.fingerprints)),  # type: ignore
+                         (2, {1, 2}, [7]))
+        self.assertFalse(self.checkpointer.lock.locked())
+
+
+if __name__ == '__main__':
+    unittest.main()
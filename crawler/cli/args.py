@@ -11,15 +11,31 @@ class Config:
 
     debug: bool
     show_progress: bool
+    metrics_file: str | None
+    metrics_interval: float
 
     user_agent: str
     fetch_header: Dict[str, str]
+    connect_timeout: float
+    read_timeout: float
+    max_body_size: int
 
     default_crawl_delay: float
     default_max_concurrent_requests_per_domain: int
     max_concurrency: int
+    parse_workers: int
+    parse_queue_size: int
 
     save_interval: int
+    dedup: bool
+    near_dup_distance: int
+    warc_writers: int
+
+    resume: bool
+    checkpoint_interval: int
+
+    recrawl: bool
+    revisit_interval: float
 
     run: bool
 
@@ -59,6 +75,20 @@ def parse_args() -> Config:
         dest='show_progress',
         default=False,
     )
+    parser.add_argument(
+        "--metrics-file",
+        help="File the crawl metrics are periodically written to, as JSON if it ends in .json or in the Prometheus text format otherwise",
+        type=str,
+        default=None,
+        dest='metrics_file',
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        help="Seconds between metrics exports",
+        type=float,
+        default=DEFAULT_METRICS_INTERVAL,
+        dest='metrics_interval',
+    )
     parser.add_argument(
         "-c",
         "--max-concurrency",
@@ -67,6 +97,20 @@ def parse_args() -> Config:
         default=DEFAULT_MAX_CONCURRENCY,
         dest='max_concurrency',
     )
+    parser.add_argument(
+        "--parse-workers",
+        help="Number of processes used to parse fetched pages",
+        type=int,
+        default=DEFAULT_PARSE_WORKERS,
+        dest='parse_workers',
+    )
+    parser.add_argument(
+        "--parse-queue-size",
+        help="Maximum number of fetched pages waiting to be parsed",
+        type=int,
+        default=DEFAULT_PARSE_QUEUE_SIZE,
+        dest='parse_queue_size',
+    )
     parser.add_argument(
         "--domain-concurrency",
         help="Default maximum number simultaneous of requests per domain",
@@ -81,6 +125,27 @@ def parse_args() -> Config:
         default=DEFAULT_CRAWL_DELAY,
         dest='default_crawl_delay',
     )
+    parser.add_argument(
+        "--connect-timeout",
+        help="Seconds to wait for a connection to be established",
+        type=float,
+        default=DEFAULT_CONNECT_TIMEOUT,
+        dest='connect_timeout',
+    )
+    parser.add_argument(
+        "--read-timeout",
+        help="Seconds to wait between bytes received from the server",
+        type=float,
+        default=DEFAULT_READ_TIMEOUT,
+        dest='read_timeout',
+    )
+    parser.add_argument(
+        "--max-body-size",
+        help="Maximum size in bytes of a page body, larger pages are dropped",
+        type=int,
+        default=DEFAULT_MAX_BODY_SIZE,
+        dest='max_body_size',
+    )
     parser.add_argument(
         "--save-interval",
         help="Number of pages written to each warc file",
@@ -88,6 +153,55 @@ def parse_args() -> Config:
         default=DEFAULT_SAVE_INTERVAL,
         dest='save_interval',
     )
+    parser.add_argument(
+        "--no-dedup",
+        help="Store near-duplicate pages instead of skipping them",
+        action='store_false',
+        dest='dedup',
+        default=True,
+    )
+    parser.add_argument(
+        "--near-dup-distance",
+        help="Maximum Hamming distance between SimHashes of near-duplicate pages",
+        type=int,
+        default=DEFAULT_NEAR_DUP_DISTANCE,
+        dest='near_dup_distance',
+    )
+    parser.add_argument(
+        "--warc-writers",
+        help="Number of threads writing WARC files, each to its own file",
+        type=int,
+        default=DEFAULT_WARC_WRITERS,
+        dest='warc_writers',
+    )
+    parser.add_argument(
+        "--resume",
+        help="Resume from the last checkpoint instead of wiping the corpus",
+        action='store_true',
+        dest='resume',
+        default=False,
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        help="Number of pages crawled between checkpoints",
+        type=int,
+        default=DEFAULT_CHECKPOINT_INTERVAL,
+        dest='checkpoint_interval',
+    )
+    parser.add_argument(
+        "--recrawl",
+        help="Revisit the pages in the existing WARC files with conditional requests",
+        action='store_true',
+        dest='recrawl',
+        default=False,
+    )
+    parser.add_argument(
+        "--revisit-interval",
+        help="Seconds between revisits of a page that changes on every other visit",
+        type=float,
+        default=DEFAULT_REVISIT_INTERVAL,
+        dest='revisit_interval',
+    )
 
     args: Config = Config()
     parser.parse_args(namespace=args)
@@ -1,6 +1,18 @@
+import os
+
 DEFAULT_CRAWL_DELAY = 0.1
 DEFAULT_MAX_CONCURRENT_REQUESTS_PER_DOMAIN = 5
 DEFAULT_MAX_CONCURRENCY = 16
 DEFAULT_PAGE_COUNT = 100000
 DEFAULT_CORPUS_DIR = "corpus"
 DEFAULT_SAVE_INTERVAL = 1000
+DEFAULT_PARSE_WORKERS = os.cpu_count() or 1
+DEFAULT_PARSE_QUEUE_SIZE = 64
+DEFAULT_WARC_WRITERS = 1
+DEFAULT_CHECKPOINT_INTERVAL = 1000
+DEFAULT_CONNECT_TIMEOUT = 3.0
+DEFAULT_READ_TIMEOUT = 5.0
+DEFAULT_MAX_BODY_SIZE = 2 * 1024 * 1024
+DEFAULT_NEAR_DUP_DISTANCE = 3
+DEFAULT_METRICS_INTERVAL = 10.0
+DEFAULT_REVISIT_INTERVAL = 86400.0
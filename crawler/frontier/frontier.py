@@ -1,9 +1,16 @@
 from queue import PriorityQueue, Empty, Full
+import hashlib
 import random
-from typing import Tuple
+from typing import List, Tuple
 
 
 QUEUE_MAX_SIZE: int = 1000
+GET_TIMEOUT: float = 0.5
+
+
+def url_hash(url: str) -> int:
+    """Stable 64-bit hash of a URL, unlike `hash` which is salted per process."""
+    return int.from_bytes(hashlib.blake2b(url.encode(), digest_size=8).digest())
 
 
 class Frontier:
@@ -11,16 +18,21 @@ class Frontier:
         self.queue: PriorityQueue[Tuple[int, str]
                                   ] = PriorityQueue(QUEUE_MAX_SIZE)
 
-    def put(self, url: str) -> None:
-        prio: int = random.randrange(0, QUEUE_MAX_SIZE)
+    def put(self, url: str, prio: int | None = None, block: bool = False) -> None:
+        """Queue a URL, at a random priority unless one is given.
+
+        URLs are dropped when the queue is full, unless `block` is set.
+        """
+        if prio is None:
+            prio = random.randrange(0, QUEUE_MAX_SIZE)
         try:
-            self.queue.put_nowait(item=(prio, url))
+            self.queue.put(item=(prio, url), block=block)
         except Full:
             pass
 
     def get(self) -> str | None:
         try:
-            _, url = self.queue.get()
+            _, url = self.queue.get(timeout=GET_TIMEOUT)
             return url
         except Empty:
             return None
@@ -31,4 +43,17 @@ class Frontier:
     def load(self, urls: list[str]) -> None:
         """Load a list of URLs into the queue."""
         for url in urls:
-            self.put(url)
\ No newline at end of file
+            self.put(url)
+
+    def snapshot(self) -> List[Tuple[int, str]]:
+        """Return a copy of the queued <priority, URL> entries."""
+        with self.queue.mutex:
+            return list(self.queue.queue)
+
+    def restore(self, items: List[Tuple[int, str]]) -> None:
+        """Load entries taken with `snapshot`, keeping their priorities."""
+        for item in items:
+            try:
+                self.queue.put_nowait(item=item)
+            except Full:
+                break
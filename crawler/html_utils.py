@@ -0,0 +1,69 @@
+from typing import List
+from bs4 import BeautifulSoup, SoupStrainer
+from simhash_utils import simhash
+
+from bs4 import XMLParsedAsHTMLWarning
+import warnings
+
+warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+
+
+class ParsedPage:
+    title: str
+    text: str
+    links: List[str]
+    fingerprint: int | None
+
+    def __init__(self, title: str, text: str, links: List[str], fingerprint: int | None = None) -> None:
+        self.title = title
+        self.text = text
+        self.links = links
+        self.fingerprint = fingerprint
+
+
+def parse_page(content: bytes, encoding: str | None, extract_text: bool, fingerprint: bool) -> ParsedPage:
+    """Parse raw HTML bytes into title, text, outgoing links and SimHash.
+
+    Runs inside the parse process pool, so it must stay a top-level function.
+    When neither the text nor its fingerprint is needed only the anchor tags
+    are parsed, which skips building the full document tree. Deduplication
+    needs the fingerprint and is on by default, so this cheaper path only
+    runs with --no-dedup outside debug mode.
+    """
+    if not extract_text and not fingerprint:
+        links_only = SoupStrainer(name="a", href=True)
+        soup = BeautifulSoup(
+            markup=content, features="html.parser", from_encoding=encoding, parse_only=links_only)
+        return ParsedPage(title="", text="", links=_extract_links(soup))
+
+    soup = BeautifulSoup(
+        markup=content, features="html.parser", from_encoding=encoding)
+
+    title: str
+    if soup.title and soup.title.string:
+        title = soup.title.string.strip()
+    else:
+        title = ""
+
+    # remove unwanted elements
+    for element in soup(name=["script", "style", "noscript"]):
+        element.extract()
+
+    links = _extract_links(soup)
+
+    text = str(object=soup.get_text(separator=" ", strip=True))
+
+    return ParsedPage(
+        title=title,
+        text=text,
+        links=links,
+        fingerprint=simhash(text) if fingerprint else None,
+    )
+
+
+def _extract_links(soup: BeautifulSoup) -> List[str]:
+    """Return the distinct absolute http(s) links found in anchor tags."""
+    links = {
+        a["href"] for a in soup.find_all("a", href=True)    # type: ignore
+    }
+    return [link for link in links if link.startswith("http")]  # type: ignore
@@ -1,22 +1,27 @@
-from concurrent.futures import ThreadPoolExecutor
-import sys
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import multiprocessing
 import threading
 import time
-from typing import Any, Dict, List, Set
+from queue import Queue, Empty, Full
+from typing import Any, Dict, List, Set, Tuple
 from urllib.robotparser import RobotFileParser
-from bs4 import BeautifulSoup
 import requests
+from urllib3.exceptions import ReadTimeoutError
 from cli import args as cli
 from frontier.frontier import *
 from cli.defaults import *
+from checkpoint_utils import Checkpointer, CrawlState
 from domain_utils import DomainControler
-from warc_utils import WarcControler
+from html_utils import ParsedPage, parse_page
+from simhash_utils import SimHashIndex
+from metrics_utils import Metrics, MetricsExporter
+from recrawl_utils import PageHistory, RecrawlScheduler, payload_digest
+from warc_utils import WarcControler, Revisit, SERVER_NOT_MODIFIED, IDENTICAL_PAYLOAD_DIGEST
 
-from bs4 import XMLParsedAsHTMLWarning
-import warnings
-
-warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
 
+PARSE_QUEUE_TIMEOUT: float = 0.5
+FETCH_CHUNK_SIZE: int = 64 * 1024
+HTML_CONTENT_TYPES: Set[str] = {"text/html", "application/xhtml+xml"}
 
 stdout_lock: threading.Lock
 
@@ -35,57 +40,151 @@ class Crawler:
     cfg: cli.Config
     fontier: Frontier
     visited: Set[int]
+    in_flight: Set[str]
     domain_data: Dict[str, DomainControler]
     semaphore: threading.Semaphore
+    parse_queue: Queue[Tuple[str, requests.Response, bytes]]
+    parse_pool: ProcessPoolExecutor
     warc: WarcControler
+    checkpointer: Checkpointer
+    fingerprints: SimHashIndex
+    metrics: Metrics
+    recrawl: RecrawlScheduler | None
+    feeding: bool
     run: bool
     count: int
+    duplicates: int
     t: float
 
     def __init__(self, cfg: cli.Config) -> None:
         self.cfg = cfg
         self.frontier = Frontier()
         self.visited = set()
+        self.in_flight = set()
         self.domain_data = dict()
         self.semaphore = threading.Semaphore(
             value=self.cfg.max_concurrency
         )
-        self.warc = WarcControler(config=cfg)
+        self.parse_queue = Queue(maxsize=self.cfg.parse_queue_size)
+        # workers are spawned rather than forked since the parent is threaded
+        self.parse_pool = ProcessPoolExecutor(
+            max_workers=self.cfg.parse_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self.metrics = Metrics()
+        self.warc = WarcControler(config=cfg, metrics=self.metrics)
+        self.checkpointer = Checkpointer(corpus_dir=cfg.corpus_dir)
+        self.fingerprints = SimHashIndex(max_distance=cfg.near_dup_distance)
+        self.recrawl = None
+        if cfg.recrawl:
+            self.recrawl = RecrawlScheduler(
+                corpus_dir=cfg.corpus_dir, base_interval=cfg.revisit_interval)
+            # loaded here rather than with the revisits, which a resumed crawl skips
+            self.recrawl.load()
+        self.feeding = False
         self.run = True
         self.count = 0
+        self.duplicates = 0
         self.t = time.time()
 
-    def start(self) -> None:
-        """Crawl using a thread pool to limit concurrency."""
+        self.metrics.gauge("frontier_depth", self.frontier.queue.qsize)
+        self.metrics.gauge("parse_queue_depth", self.parse_queue.qsize)
+        self.metrics.gauge("warc_queue_depth", self.warc.queue.qsize)
+        self.metrics.gauge("in_flight", lambda: len(self.in_flight))
+        self.metrics.gauge("visited", lambda: len(self.visited))
 
-        self._enqueue_seeds()
+    def start(self) -> None:
+        """Crawl using a thread pool for fetching and a process pool for parsing."""
+
+        if self.cfg.resume and self._restore():
+            pass
+        elif self.recrawl is not None and self.recrawl.pages:
+            self._enqueue_revisits()
+        else:
+            self._enqueue_seeds()
+
+        parsers: List[threading.Thread] = [
+            threading.Thread(target=self._parse_loop, daemon=True)
+            for _ in range(self.cfg.parse_workers)
+        ]
+        for parser in parsers:
+            parser.start()
+
+        exporter: MetricsExporter | None = None
+        if self.cfg.metrics_file:
+            exporter = MetricsExporter(
+                self.metrics, self.cfg.metrics_file, self.cfg.metrics_interval)
+            exporter.start()
 
         with ThreadPoolExecutor(max_workers=self.cfg.max_concurrency) as executor:
             while self.run:
                 url: str | None = self.frontier.get()
-                if not url or hash(url) in self.visited:
+                if not url:
+                    if self._exhausted():
+                        print("The frontier is exhausted, stopping the crawl")
+                        self.run = False
+                    continue
+                if url_hash(url) in self.visited:
+                    continue
+                if self.recrawl is not None and not self.recrawl.is_due(url, time.time()):
                     continue
 
+                # bounds in-flight fetches so a full parse queue stalls the frontier
+                self.semaphore.acquire()
+                self.in_flight.add(url)
                 executor.submit(self._fetch_page, url)
 
             if not self.run:
                 executor.shutdown(wait=False, cancel_futures=True)
 
+        for parser in parsers:
+            parser.join()
+        self.parse_pool.shutdown(wait=True, cancel_futures=True)
+        self.warc.close()
+        # the final checkpoint must not be skipped for a periodic one still being written
+        self._checkpoint(block=True)
+
+        if exporter is not None:
+            exporter.stop()
+
+        if self.cfg.dedup:
+            print(
+                f"Skipped {self.duplicates} near-duplicate pages ({self._duplicate_rate():.2%})")
+
+    def _exhausted(self) -> bool:
+        """Whether no URL is queued and none can be queued anymore.
+
+        Only the revisit feeder and in-flight pages add to the frontier, so
+        they are checked first: once both are idle, an empty frontier stays empty.
+        """
+        return not self.feeding and not self.in_flight and not self.frontier
+
     def _fetch_page(self, url: str) -> None:
-        """Fetches a page, extracts links and the title, and marks it as visited."""
+        """Fetches a page and hands it over to the parse stage."""
+        handed_over: bool = False
+        try:
+            handed_over = self._fetch(url)
+        finally:
+            if not handed_over:
+                self.in_flight.discard(url)
+            self.semaphore.release()
+
+    def _fetch(self, url: str) -> bool:
         try:
             domain = url.split(sep="/")[2]
         except:
-            return
+            return False
 
         if not domain in self.domain_data:
             robots_url = f'http://{domain}/robots.txt'
             rp = RobotFileParser(url=robots_url)
 
             try:
-                rp.read()
+                with self.metrics.time("robots"):
+                    rp.read()
             except:
-                return
+                self.metrics.inc("robots_errors", domain)
+                return False
 
             self.domain_data[domain] = DomainControler(self.cfg, rp)
 
@@ -105,75 +204,226 @@ class Crawler:
             dm.last_request_time = time.time()
 
         if not dm.robots.can_fetch(useragent=self.cfg.user_agent, url=url):
-            return
+            self.metrics.inc("robots_denied", domain)
+            return False
+
+        headers: Dict[str, str] = self.cfg.fetch_header
+        previous: PageHistory | None = None
+        if self.recrawl is not None:
+            previous = self.recrawl.get(url)
+            if previous is not None:
+                headers = {**headers, **previous.conditional_headers()}
 
         response: requests.Response
-        with self.semaphore and dm.semaphore:
+        body: bytes | None
+        with dm.semaphore:
             try:
-                response = requests.get(
-                    url=url,
-                    timeout=1,
-                    headers=self.cfg.fetch_header,
-                )
-                response.raise_for_status()
+                # returns once the headers are in, so this covers DNS, connect and TTFB
+                with self.metrics.time("connect"):
+                    response = requests.get(
+                        url=url,
+                        timeout=(self.cfg.connect_timeout,
+                                 self.cfg.read_timeout),
+                        headers=headers,
+                        stream=True,
+                    )
+                with response:
+                    response.raise_for_status()
+                    if response.status_code == 304 and previous is not None:
+                        self.metrics.inc("not_modified", domain)
+                        self._store_revisit(
+                            url, response, previous, SERVER_NOT_MODIFIED)
+                        return True
+                    if not _is_html(response):
+                        self.metrics.inc("rejected_type", domain)
+                        return False
+                    with self.metrics.time("download"):
+                        body = _read_body(response, self.cfg.max_body_size)
+            except requests.Timeout:
+                self.metrics.inc("timeouts", domain)
+                return False
+            except requests.ConnectionError as error:
+                # a read timeout while streaming the body surfaces as a ConnectionError
+                self.metrics.inc(
+                    "timeouts" if _is_read_timeout(error) else "errors", domain)
+                return False
             except requests.RequestException:
-                return
+                self.metrics.inc("errors", domain)
+                return False
 
-        soup = BeautifulSoup(markup=response.text, features="html.parser")
+        if body is None:
+            self.metrics.inc("rejected_size", domain)
+            return False
 
-        # remove unwanted elements
-        for element in soup(name=["script", "style", "noscript"]):
-            element.extract()
+        self.metrics.inc("fetched", domain)
 
-        text_content = str(object=soup.get_text(separator=" ", strip=True))
+        if previous is not None and payload_digest(body) == previous.digest:
+            self.metrics.inc("unchanged", domain)
+            self._store_revisit(url, response, previous,
+                                IDENTICAL_PAYLOAD_DIGEST)
+            return True
 
-        if self.cfg.debug:
-            title: str
-            if soup.title and soup.title.string:
-                title = soup.title.string.strip()
-            else:
-                title = ""
+        # blocks while the parsers are behind, dropping the page on shutdown
+        while self.run:
+            try:
+                self.parse_queue.put((url, response, body), timeout=PARSE_QUEUE_TIMEOUT)
+                return True
+            except Full:
+                continue
+
+        return False
 
+    def _parse_loop(self) -> None:
+        """Feeds fetched pages to the process pool, one page at a time."""
+        while self.run:
+            try:
+                url, response, body = self.parse_queue.get(timeout=PARSE_QUEUE_TIMEOUT)
+            except Empty:
+                continue
+
+            try:
+                with self.metrics.time("parse"):
+                    page: ParsedPage = self.parse_pool.submit(
+                        parse_page,
+                        body,
+                        _declared_charset(response),
+                        self.cfg.debug,
+                        self.cfg.dedup,
+                    ).result()
+            except Exception:
+                self.metrics.inc("parse_errors")
+                self.in_flight.discard(url)
+                continue
+
+            self._process_page(url, response, body, page)
+
+    def _process_page(self, url: str, response: requests.Response, body: bytes, page: ParsedPage) -> None:
+        """Stores a parsed page, enqueues its links and marks it as visited.
+
+        Near-duplicates of stored pages are only marked as visited, since
+        their links mostly lead to more duplicates.
+        """
+        if page.fingerprint is not None and self.fingerprints.find_or_add(page.fingerprint):
+            self.duplicates += 1
+            self.metrics.inc("duplicates")
+            self.visited.add(url_hash(url))
+            self.in_flight.discard(url)
+            return
+
+        if self.cfg.debug:
             timestamp = int(time.time())
 
-            text = " ".join(text_content[:1000].split()[:20])
+            text = " ".join(page.text[:1000].split()[:20])
             with stdout_lock:
                 print(
                     r'{'
-                    f'"Title": "{title}",'
+                    f'"Title": "{page.title}",'
                     f'"URL": "{url},'
                     f'"Text": "{text}",'
                     f'"Timestamp": {timestamp}'
                     r'}'
                 )
-        self.warc.write(url=url, resp=response)
+        self.warc.write(url=url, resp=response, payload=body)
 
-        links: Set[str] = {
-            a["href"] for a in soup.find_all("a", href=True)    # type: ignore
-        }
-
-        for link in links:
-            if link.startswith("http") and link not in self.visited:
+        for link in page.links:
+            if url_hash(link) not in self.visited:
                 self.frontier.put(link)
 
-        self.visited.add(hash(url))
+        self._finish_page(url)
+
+    def _store_revisit(self, url: str, response: requests.Response, previous: PageHistory, profile: str) -> None:
+        """Records an unchanged page as a revisit of its last capture."""
+        revisit = Revisit(profile=profile, digest=previous.digest,
+                          refers_to_date=previous.capture_date)
+        self.warc.write_revisit(url=url, resp=response, revisit=revisit)
+        self._finish_page(url)
+
+    def _finish_page(self, url: str) -> None:
+        """Marks a stored page as visited and updates the crawl progress."""
+        self.visited.add(url_hash(url))
+        self.in_flight.discard(url)
 
         self.count += 1
+        self.metrics.inc("pages")
 
         if self.count >= self.cfg.max_page_count:
             self.run = False
 
         if self.cfg.show_progress and self.count % 50 == 0:
             with stdout_lock:
-                print(f"{self.count}/{self.cfg.max_page_count} | {time.time() - self.t} seconds elapsed | {self.count / (time.time() - self.t):.2f} pages/second")
+                print(f"{self.count}/{self.cfg.max_page_count} | {time.time() - self.t} seconds elapsed | {self.count / (time.time() - self.t):.2f} pages/second | {self._duplicate_rate():.2%} near-duplicates")
+
+        if self.count % self.cfg.checkpoint_interval == 0:
+            self._checkpoint()
 
         if self.count % 1000 == 0:
             self.domain_data.clear()
-            print(
-                f"frontier size: {sys.getsizeof(self.frontier.queue.queue)} bytes")
-            print(f"visited size: {sys.getsizeof(self.visited)} bytes")
-            print(f"domain data size: {sys.getsizeof(self.domain_data)} bytes")
-            print(f"warc controler size: {sys.getsizeof(self.warc)} bytes")
+            if self.cfg.show_progress:
+                with stdout_lock:
+                    print(self.metrics.summary())
+
+    def _duplicate_rate(self) -> float:
+        """Fraction of parsed pages skipped as near-duplicates."""
+        parsed: int = self.count + self.duplicates
+        return self.duplicates / parsed if parsed else 0.0
+
+    def _checkpoint(self, block: bool = False) -> None:
+        """Snapshots the crawl state and writes it out, in the background unless `block`."""
+        # pages still being fetched or parsed go first so they are not lost
+        frontier = [(0, url) for url in list(self.in_flight)]
+        frontier.extend(self.frontier.snapshot())
+
+        state = CrawlState(
+            count=self.count,
+            frontier=frontier,
+            visited=set(self.visited),
+            domains={
+                domain: (dm.last_request_time, dm.robots)
+                for domain, dm in list(self.domain_data.items())
+            },
+            warc_file_index=self.warc.file_index,
+            fingerprints=self.fingerprints.fingerprints(),
+        )
+        # visited pages are only safe to skip once their records are on disk
+        self.warc.sync()
+        self.checkpointer.save(state, block=block)
+
+    def _restore(self) -> bool:
+        """Loads the last checkpoint, returning False if there is none."""
+        state: CrawlState | None = self.checkpointer.load()
+        if state is None:
+            return False
+
+        self.count = state.count
+        self.visited = state.visited
+        for domain, (last_request_time, robots) in state.domains.items():
+            dm = DomainControler(self.cfg, robots)
+            dm.last_request_time = last_request_time
+            self.domain_data[domain] = dm
+        self.frontier.restore(state.frontier)
+        self.fingerprints.load(state.fingerprints)
+
+        print(
+            f"Resuming after {state.count} pages, WARC files up to crawl_{state.warc_file_index}")
+        return True
+
+    def _enqueue_revisits(self) -> None:
+        """Feeds the pages due for a revisit to the frontier, most overdue first."""
+        due: List[Tuple[int, str]] = self.recrawl.due_urls(  # type: ignore
+            time.time())
+        print(f"{len(due)} of {len(self.recrawl.pages)} known pages are due for a revisit")  # type: ignore
+
+        def feed() -> None:
+            try:
+                for prio, url in due:
+                    if not self.run:
+                        return
+                    self.frontier.put(url, prio=prio, block=True)
+            finally:
+                self.feeding = False
+
+        self.feeding = True
+        threading.Thread(target=feed, daemon=True).start()
 
     def _enqueue_seeds(self) -> None:
         with open(file=self.cfg.seed_file, mode='r') as f:
@@ -185,5 +435,48 @@ class Crawler:
                 self.frontier.put(seed)
 
 
+def _is_html(response: requests.Response) -> bool:
+    """Whether the response headers announce an HTML document.
+
+    Responses without a Content-Type are let through for the parser to sniff.
+    """
+    content_type: str = response.headers.get("Content-Type", "")
+    mime: str = content_type.split(";")[0].strip().lower()
+    return not mime or mime in HTML_CONTENT_TYPES
+
+
+def _read_body(response: requests.Response, max_size: int) -> bytes | None:
+    """Read a streamed body, giving up as soon as it grows past `max_size`."""
+    declared_size: str = response.headers.get("Content-Length", "")
+    if declared_size.isdigit() and int(declared_size) > max_size:
+        return None
+
+    body = bytearray()
+    for chunk in response.iter_content(chunk_size=FETCH_CHUNK_SIZE):
+        body += chunk
+        if len(body) > max_size:
+            return None
+
+    return bytes(body)
+
+
+def _is_read_timeout(error: requests.ConnectionError) -> bool:
+    """Whether `error` wraps a read timeout raised by urllib3 inside `iter_content`."""
+    return any(isinstance(arg, ReadTimeoutError) for arg in error.args) \
+        or isinstance(error.__context__, ReadTimeoutError)
+
+
+def _declared_charset(response: requests.Response) -> str | None:
+    """Charset from the Content-Type header, if the server declared one.
+
+    Unlike `response.encoding`, this does not fall back to ISO-8859-1, so the
+    parser can still pick up the charset from the document's meta tags.
+    """
+    content_type: str = response.headers.get("Content-Type", "")
+    if "charset" not in content_type.lower():
+        return None
+    return response.encoding
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,204 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+
+STAGES: Tuple[str, ...] = ("robots", "connect", "download", "parse", "warc_write")
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+TOP_DOMAINS: int = 100
+METRIC_PREFIX: str = "crawler"
+
+
+class Histogram:
+    """Latency histogram with fixed buckets, in seconds."""
+    lock: threading.Lock
+    counts: List[int]
+    total: float
+    count: int
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        # the last slot counts observations above the largest bucket
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        i: int = bisect_left(LATENCY_BUCKETS, seconds)
+        with self.lock:
+            self.counts[i] += 1
+            self.total += seconds
+            self.count += 1
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "buckets": dict(zip(LATENCY_BUCKETS, self.counts)),
+                "overflow": self.counts[-1],
+                "sum": self.total,
+                "count": self.count,
+            }
+
+
+class Metrics:
+    """Crawler metrics, cheap enough to be updated from the fetch and parse paths.
+
+    Gauges are callbacks sampled only when the metrics are exported, so they
+    cost nothing while crawling.
+    """
+    lock: threading.Lock
+    stages: Dict[str, Histogram]
+    counters: Counter[str]
+    domains: Dict[str, Counter[str]]
+    gauges: Dict[str, Callable[[], float]]
+    started: float
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.stages = {stage: Histogram() for stage in STAGES}
+        self.counters = Counter()
+        self.domains = dict()
+        self.gauges = dict()
+        self.started = time.time()
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """Record the time spent in the `with` block under `stage`."""
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[stage].observe(time.perf_counter() - start)
+
+    def inc(self, name: str, domain: str | None = None) -> None:
+        """Increment a counter, and the same counter of `domain` if given."""
+        with self.lock:
+            self.counters[name] += 1
+            if domain is not None:
+                self.domains.setdefault(domain, Counter())[name] += 1
+
+    def gauge(self, name: str, fn: Callable[[], float]) -> None:
+        """Register a value to be sampled at export time."""
+        self.gauges[name] = fn
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return every metric as plain data."""
+        with self.lock:
+            counters: Dict[str, int] = dict(self.counters)
+            top_domains: List[Tuple[str, Counter[str]]] = sorted(
+                self.domains.items(),
+                key=lambda item: item[1]["fetched"],
+                reverse=True,
+            )[:TOP_DOMAINS]
+            domains: Dict[str, Dict[str, int]] = {
+                domain: dict(counts) for domain, counts in top_domains
+            }
+
+        attempts: int = counters.get("fetched", 0) + \
+            counters.get("errors", 0) + counters.get("timeouts", 0)
+        return {
+            "timestamp": time.time(),
+            "uptime": time.time() - self.started,
+            "counters": counters,
+            "error_rate": counters.get("errors", 0) / attempts if attempts else 0.0,
+            "timeout_rate": counters.get("timeouts", 0) / attempts if attempts else 0.0,
+            "gauges": {name: fn() for name, fn in self.gauges.items()},
+            "stages": {stage: h.snapshot() for stage, h in self.stages.items()},
+            "domains": domains,
+        }
+
+    def summary(self) -> str:
+        """One-line mean latency per stage, for the progress output."""
+        return " | ".join(
+            f"{stage} {h.mean() * 1000:.1f}ms" for stage, h in self.stages.items()
+        )
+
+    def to_prometheus(self) -> str:
+        """Render a snapshot in the Prometheus text exposition format."""
+        snap: Dict[str, Any] = self.snapshot()
+        lines: List[str] = []
+
+        for name, value in snap["counters"].items():
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name}_total counter")
+            lines.append(f"{METRIC_PREFIX}_{name}_total {value}")
+
+        for name in ("error_rate", "timeout_rate"):
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+            lines.append(f"{METRIC_PREFIX}_{name} {snap[name]}")
+
+        for name, value in snap["gauges"].items():
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+            lines.append(f"{METRIC_PREFIX}_{name} {value}")
+
+        hist: str = f"{METRIC_PREFIX}_stage_seconds"
+        lines.append(f"# TYPE {hist} histogram")
+        for stage, data in snap["stages"].items():
+            cumulative: int = 0
+            for bound, count in data["buckets"].items():
+                cumulative += count
+                lines.append(
+                    f'{hist}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(
+                f'{hist}_bucket{{stage="{stage}",le="+Inf"}} {data["count"]}')
+            lines.append(f'{hist}_sum{{stage="{stage}"}} {data["sum"]}')
+            lines.append(f'{hist}_count{{stage="{stage}"}} {data["count"]}')
+
+        domain_metric: str = f"{METRIC_PREFIX}_domain_total"
+        lines.append(f"# TYPE {domain_metric} counter")
+        for domain, counts in snap["domains"].items():
+            for name, value in counts.items():
+                lines.append(
+                    f'{domain_metric}{{domain="{domain}",event="{name}"}} {value}')
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> None:
+        """Write the metrics as JSON if `path` ends in .json, else as Prometheus text."""
+        if path.endswith(".json"):
+            content: str = json.dumps(self.snapshot())
+        else:
+            content = self.to_prometheus()
+
+        tmp_path = f"{path}.tmp"
+        with open(file=tmp_path, mode="w") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+
+class MetricsExporter:
+    """Background thread exporting metrics to a file every `interval` seconds."""
+    metrics: Metrics
+    path: str
+    interval: float
+    stopped: threading.Event
+    thread: threading.Thread
+
+    def __init__(self, metrics: Metrics, path: str, interval: float) -> None:
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def _loop(self) -> None:
+        while not self.stopped.wait(timeout=self.interval):
+            self.metrics.export(self.path)
+
+    def stop(self) -> None:
+        """Stop the thread and write the final values."""
+        self.stopped.set()
+        self.thread.join()
+        self.metrics.export(self.path)
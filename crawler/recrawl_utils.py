@@ -0,0 +1,154 @@
+import base64
+import hashlib
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from warcio.archiveiterator import ArchiveIterator
+from warcio.recordloader import ArcWarcRecord
+from warc_utils import WARC_FILE_PATTERN
+
+
+MIN_INTERVAL: float = 1.0
+MAX_INTERVAL_FACTOR: float = 30.0
+# change rate of a page revisited exactly every base interval
+REFERENCE_CHANGE_RATE: float = 0.5
+
+
+def payload_digest(body: bytes) -> str:
+    """SHA-1 digest of a body, in the format of WARC-Payload-Digest."""
+    return "sha1:" + base64.b32encode(hashlib.sha1(body).digest()).decode()
+
+
+class PageHistory:
+    """Validators and change statistics of a URL, rebuilt from prior WARCs."""
+    etag: str | None
+    last_modified: str | None
+    digest: str
+    capture_date: str
+    last_checked: float
+    checks: int
+    changes: int
+
+    def __init__(self, digest: str, capture_date: str, last_checked: float) -> None:
+        self.etag = None
+        self.last_modified = None
+        self.digest = digest
+        self.capture_date = capture_date
+        self.last_checked = last_checked
+        self.checks = 0
+        self.changes = 0
+
+    def change_rate(self) -> float:
+        """Estimated probability that a revisit finds the page changed.
+
+        Laplace-smoothed, so a page seen only once is assumed to change on
+        every other visit.
+        """
+        return (self.changes + 1) / (self.checks + 2)
+
+    def revisit_interval(self, base_interval: float) -> float:
+        """Seconds to wait before revisiting, shorter for pages that change often.
+
+        A page changing on every other visit, like any page seen only once,
+        waits `base_interval`.
+        """
+        interval: float = base_interval * REFERENCE_CHANGE_RATE / self.change_rate()
+        return max(min(interval, base_interval * MAX_INTERVAL_FACTOR), MIN_INTERVAL)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Validators to send with a conditional GET."""
+        headers: Dict[str, str] = dict()
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class RecrawlScheduler:
+    """Decides which known URLs are due for a revisit."""
+    corpus_dir: str
+    base_interval: float
+    lock: threading.Lock
+    pages: Dict[str, PageHistory]
+
+    def __init__(self, corpus_dir: str, base_interval: float) -> None:
+        self.corpus_dir = corpus_dir
+        self.base_interval = base_interval
+        self.lock = threading.Lock()
+        self.pages = dict()
+
+    def load(self) -> None:
+        """Rebuild every page's history from the WARC files, oldest first.
+
+        A response record is a capture, counted as a change when its digest
+        differs from the previous capture. A revisit record is an unchanged
+        check.
+        """
+        files: List[Tuple[int, str]] = []
+        for name in os.listdir(self.corpus_dir):
+            match = WARC_FILE_PATTERN.match(name)
+            if match:
+                files.append((int(match.group(1)), name))
+
+        for _, name in sorted(files):
+            with open(file=os.path.join(self.corpus_dir, name), mode="rb") as f:
+                for record in ArchiveIterator(f):
+                    self._replay(record)
+
+    def _replay(self, record: ArcWarcRecord) -> None:
+        url: str | None = record.rec_headers.get_header("WARC-Target-URI")
+        if not url:
+            return
+
+        warc_date: str = record.rec_headers.get_header("WARC-Date")
+        checked: float = datetime.fromisoformat(warc_date).timestamp()
+        page: PageHistory | None = self.pages.get(url)
+
+        if record.rec_type == "response":
+            digest: str = record.rec_headers.get_header("WARC-Payload-Digest")
+            if page is None:
+                page = PageHistory(digest, warc_date, checked)
+                self.pages[url] = page
+            else:
+                page.checks += 1
+                if digest != page.digest:
+                    page.changes += 1
+                page.digest = digest
+                page.capture_date = warc_date
+        elif record.rec_type == "revisit" and page is not None:
+            page.checks += 1
+        else:
+            return
+
+        page.last_checked = checked
+        if record.http_headers:
+            page.etag = record.http_headers.get_header("ETag") or page.etag
+            page.last_modified = record.http_headers.get_header(
+                "Last-Modified") or page.last_modified
+
+    def get(self, url: str) -> PageHistory | None:
+        with self.lock:
+            return self.pages.get(url)
+
+    def is_due(self, url: str, now: float) -> bool:
+        """Whether `url` should be fetched now. Unknown URLs always are."""
+        page: PageHistory | None = self.get(url)
+        if page is None:
+            return True
+        return now - page.last_checked >= page.revisit_interval(self.base_interval)
+
+    def due_urls(self, now: float) -> List[Tuple[int, str]]:
+        """Return <priority, URL> pairs of the due pages, most overdue first."""
+        due: List[Tuple[int, str]] = []
+        with self.lock:
+            for url, page in self.pages.items():
+                overdue: float = (now - page.last_checked) / \
+                    page.revisit_interval(self.base_interval)
+                if overdue >= 1:
+                    # negative, so revisits go ahead of newly discovered links
+                    due.append((-int(overdue * 1000), url))
+        due.sort()
+        return due
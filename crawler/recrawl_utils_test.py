@@ -0,0 +1,76 @@
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+from metrics_utils import Metrics
+from recrawl_utils import MAX_INTERVAL_FACTOR, PageHistory, RecrawlScheduler, payload_digest
+from warc_utils import WarcControler, Revisit, SERVER_NOT_MODIFIED
+
+DAY = 86400.0
+
+
+def response(etag):
+    return SimpleNamespace(headers={'Content-Type': 'text/html', 'ETag': etag},
+                           status_code=200, reason='OK')
+
+
+def history(checks, changes, last_checked=0.0):
+    page = PageHistory(digest="sha1:X", capture_date="2024-01-01T00:00:00Z", last_checked=last_checked)
+    page.checks, page.changes = checks, changes
+    return page
+
+
+class TestRecrawlScheduler(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_load_replays_responses_and_revisits(self):
+        cfg = SimpleNamespace(corpus_dir=self.dir, resume=False, recrawl=False,
+                              save_interval=2, warc_writers=1)
+        warc = WarcControler(cfg, Metrics())  # type: ignore
+        warc.write("http://a/", response('"v1"'), b"first")  # type: ignore
+        warc.write("http://b/", response('"b"'), b"static")  # type: ignore
+        warc.write("http://a/", response('"v2"'), b"second")  # type: ignore
+        warc.write_revisit("http://a/", response('"v2"'),  # type: ignore
+                           Revisit(SERVER_NOT_MODIFIED, payload_digest(b"second"), "2024-01-01T00:00:00Z"))
+        warc.write("http://b/", response('"b"'), b"static")  # type: ignore
+        warc.close()
+
+        scheduler = RecrawlScheduler(corpus_dir=self.dir, base_interval=DAY)
+        scheduler.load()
+        a, b = scheduler.get("http://a/"), scheduler.get("http://b/")
+        self.assertEqual((a.checks, a.changes, a.etag), (2, 1, '"v2"'))  # type: ignore
+        self.assertEqual(a.digest, payload_digest(b"second"))  # type: ignore
+        self.assertEqual((b.checks, b.changes, b.digest), (1, 0, payload_digest(b"static")))  # type: ignore
+        self.assertIsNone(scheduler.get("http://c/"))
+
+    def test_revisit_interval_follows_the_change_rate(self):
+        # never changed: the rate tends to 0 and the interval hits its cap
+        self.assertEqual(history(100, 0).revisit_interval(DAY), DAY * MAX_INTERVAL_FACTOR)
+        # changes on every other visit, or seen once: the base interval
+        self.assertEqual(history(0, 0).revisit_interval(DAY), DAY)
+        self.assertEqual(history(10, 5).revisit_interval(DAY), DAY)
+        # always changed: the rate tends to 1 and the interval to half the base
+        self.assertAlmostEqual(history(98, 98).revisit_interval(DAY), DAY / 2, delta=DAY / 100)
+
+    def test_is_due(self):
+        scheduler = RecrawlScheduler(corpus_dir=self.dir, base_interval=DAY)
+        scheduler.pages = {
+            "http://never/": history(100, 0),
+            "http://half/": history(10, 5),
+            "http://always/": history(98, 98),
+        }
+        self.assertTrue(scheduler.is_due("http://unknown/", 0.0))
+        self.assertEqual([url for url in scheduler.pages if scheduler.is_due(url, DAY * 0.6)],
+                         ["http://always/"])
+        self.assertEqual([url for url in scheduler.pages if scheduler.is_due(url, DAY)],
+                         ["http://half/", "http://always/"])
+        self.assertEqual(len([url for url in scheduler.pages if scheduler.is_due(url, DAY * 30)]), 3)
+        self.assertEqual([url for _, url in scheduler.due_urls(DAY)], ["http://always/", "http://half/"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import hashlib
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, List
+
+
+FINGERPRINT_BITS: int = 64
+SHINGLE_SIZE: int = 3
+TOKEN_PATTERN: re.Pattern[str] = re.compile(r"\w+")
+
+
+def simhash(text: str) -> int | None:
+    """64-bit SimHash of a text, using word 3-gram shingles as features.
+
+    Texts shorter than one shingle have no fingerprint: they would all
+    share the same few, and pages without text would be near-duplicates
+    of each other.
+    """
+    tokens: List[str] = TOKEN_PATTERN.findall(text.lower())
+    if len(tokens) < SHINGLE_SIZE:
+        return None
+    shingles: Counter[str] = Counter(
+        " ".join(tokens[i:i + SHINGLE_SIZE])
+        for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    )
+
+    weights: List[int] = [0] * FINGERPRINT_BITS
+    for shingle, weight in shingles.items():
+        feature: int = int.from_bytes(
+            hashlib.blake2b(shingle.encode(), digest_size=8).digest())
+        for bit in range(FINGERPRINT_BITS):
+            if feature >> bit & 1:
+                weights[bit] += weight
+            else:
+                weights[bit] -= weight
+
+    fingerprint: int = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+class SimHashIndex:
+    """Finds fingerprints within a Hamming distance of each other.
+
+    Fingerprints are split into `max_distance + 1` bands. Two fingerprints
+    differing in at most `max_distance` bits must agree on at least one band,
+    so only the fingerprints sharing a band value need to be compared.
+    """
+    max_distance: int
+    lock: threading.Lock
+    bands: List[range]
+    tables: List[Dict[int, array]]
+
+    def __init__(self, max_distance: int) -> None:
+        self.max_distance = max_distance
+        self.lock = threading.Lock()
+
+        band_count: int = max_distance + 1
+        width: int = FINGERPRINT_BITS // band_count
+        starts: List[int] = [i * width for i in range(band_count)]
+        ends: List[int] = starts[1:] + [FINGERPRINT_BITS]
+        self.bands = [range(start, end) for start, end in zip(starts, ends)]
+        self.tables = [dict() for _ in self.bands]
+
+    def _band_key(self, fingerprint: int, band: range) -> int:
+        return fingerprint >> band.start & ((1 << len(band)) - 1)
+
+    def find_or_add(self, fingerprint: int) -> bool:
+        """Return True if a near-duplicate is indexed, otherwise index `fingerprint`."""
+        with self.lock:
+            keys: List[int] = [self._band_key(fingerprint, band)
+                               for band in self.bands]
+
+            for table, key in zip(self.tables, keys):
+                for other in table.get(key, ()):
+                    if (fingerprint ^ other).bit_count() <= self.max_distance:
+                        return True
+
+            for table, key in zip(self.tables, keys):
+                table.setdefault(key, array("Q")).append(fingerprint)
+            return False
+
+    def fingerprints(self) -> array:
+        """Return every indexed fingerprint."""
+        with self.lock:
+            result: array = array("Q")
+            for bucket in self.tables[0].values():
+                result.extend(bucket)
+            return result
+
+    def load(self, fingerprints: array) -> None:
+        """Index fingerprints returned by `fingerprints`."""
+        for fingerprint in fingerprints:
+            self.find_or_add(fingerprint)
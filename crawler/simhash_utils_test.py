@@ -0,0 +1,43 @@
+import unittest
+from simhash_utils import SimHashIndex, simhash
+
+
+class TestSimHash(unittest.TestCase):
+    def test_short_text_has_no_fingerprint(self):
+        self.assertIsNone(simhash(""))
+        self.assertIsNone(simhash("  <> ... "))
+        self.assertIsNone(simhash("two words"))
+        self.assertIsNotNone(simhash("three whole words"))
+
+    def test_similar_texts_are_close(self):
+        text = " ".join(f"word{i}" for i in range(200))
+        edited = text.replace("word100", "other")
+        self.assertLessEqual((simhash(text) ^ simhash(edited)).bit_count(), 10)  # type: ignore
+
+
+class TestSimHashIndex(unittest.TestCase):
+    def test_find_or_add_at_max_distance(self):
+        index = SimHashIndex(max_distance=3)
+        self.assertFalse(index.find_or_add(0))
+        # one flipped bit in each of three bands: the fourth band still matches
+        self.assertTrue(index.find_or_add(1 << 0 | 1 << 16 | 1 << 32))
+        self.assertEqual(len(index.fingerprints()), 1)
+
+    def test_find_or_add_beyond_max_distance(self):
+        index = SimHashIndex(max_distance=3)
+        self.assertFalse(index.find_or_add(0))
+        self.assertFalse(index.find_or_add(0b1111))
+        # a match on a band is not enough when the full distance is too large
+        self.assertFalse(index.find_or_add(1 << 0 | 1 << 16 | 1 << 32 | 1 << 33))
+        self.assertEqual(len(index.fingerprints()), 3)
+
+    def test_load(self):
+        index = SimHashIndex(max_distance=3)
+        index.find_or_add(0xFFFF)
+        copy = SimHashIndex(max_distance=3)
+        copy.load(index.fingerprints())
+        self.assertTrue(copy.find_or_add(0xFFFE))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,75 +1,251 @@
-import json
 import os
+import re
 import shutil
 import threading
-from typing import Set, List
+from io import BufferedWriter, BytesIO, TextIOWrapper
+from queue import Queue, Empty
+from typing import List, Tuple
 import requests
-from io import BufferedWriter
 
 from cli.args import Config
-from frontier.frontier import Frontier
+from metrics_utils import Metrics
 from warcio.warcwriter import WARCWriter
 from warcio.recordloader import ArcWarcRecord
 from warcio.statusandheaders import StatusAndHeaders
 
 
-class WarcControler:
-    lock: threading.Lock
-    count: int
+WRITE_QUEUE_MAX_SIZE: int = 256
+WRITE_BATCH_SIZE: int = 32
+CDX_HEADER: str = " CDX a b m s S V g\n"
+WARC_FILE_PATTERN: re.Pattern[str] = re.compile(r"^crawl_(\d+)\.warc$")
+
+SERVER_NOT_MODIFIED: str = "http://netpreserve.org/warc/1.0/revisit/server-not-modified"
+IDENTICAL_PAYLOAD_DIGEST: str = WARCWriter.REVISIT_PROFILE
+
+# the stored payload is already decoded and de-chunked by requests
+DROPPED_HEADERS = {"content-encoding", "transfer-encoding", "content-length"}
+
+
+class Revisit:
+    """Points a revisit record at the earlier capture it repeats."""
+    profile: str
+    digest: str
+    refers_to_date: str
+
+    def __init__(self, profile: str, digest: str, refers_to_date: str) -> None:
+        self.profile = profile
+        self.digest = digest
+        self.refers_to_date = refers_to_date
+
+
+class PendingRecord:
+    url: str
+    http_headers: StatusAndHeaders
+    payload: bytes
+    revisit: Revisit | None
+
+    def __init__(self, url: str, http_headers: StatusAndHeaders, payload: bytes, revisit: Revisit | None = None) -> None:
+        self.url = url
+        self.http_headers = http_headers
+        self.payload = payload
+        self.revisit = revisit
+
+
+class WarcShard:
+    """A WARC file owned by a single writer thread, plus its CDX sidecar."""
     file_index: int
+    count: int
     file: BufferedWriter
+    index: TextIOWrapper
     writer: WARCWriter
+
+    def __init__(self, warc_dir: str, file_index: int) -> None:
+        self.file_index = file_index
+        self.count = 0
+        self.filename = f"crawl_{file_index}.warc"
+        self.file = open(file=os.path.join(warc_dir, self.filename), mode="ab")
+        self.index = open(file=os.path.join(
+            warc_dir, f"crawl_{file_index}.cdx"), mode="w")
+        self.index.write(CDX_HEADER)
+        self.writer = WARCWriter(filebuf=self.file, gzip=True)
+
+    def write(self, pending: PendingRecord) -> None:
+        """Append a record and index its offset in the compressed file."""
+        record: ArcWarcRecord
+        mime: str
+        if pending.revisit is None:
+            record = self.writer.create_warc_record(  # type: ignore
+                uri=pending.url,
+                record_type="response",
+                payload=BytesIO(pending.payload),
+                http_headers=pending.http_headers,
+            )
+            mime = pending.http_headers.get_header(
+                "Content-Type", "-").split(";")[0].strip() or "-"
+        else:
+            record = self.writer.create_revisit_record(  # type: ignore
+                uri=pending.url,
+                digest=pending.revisit.digest,
+                refers_to_uri=pending.url,
+                refers_to_date=pending.revisit.refers_to_date,
+                http_headers=pending.http_headers,
+            )
+            record.rec_headers.replace_header(
+                "WARC-Profile", pending.revisit.profile)
+            mime = "warc/revisit"
+
+        offset: int = self.file.tell()
+        self.writer.write_record(record=record)  # type: ignore
+        length: int = self.file.tell() - offset
+
+        warc_date: str = record.rec_headers.get_header("WARC-Date")
+        timestamp: str = "".join(c for c in warc_date if c.isdigit())[:14]
+        status: str = pending.http_headers.get_statuscode()
+        self.index.write(
+            f"{pending.url} {timestamp} {mime} {status} {length} {offset} {self.filename}\n")
+
+        self.count += 1
+
+    def flush(self) -> None:
+        self.file.flush()
+        self.index.flush()
+
+    def close(self) -> None:
+        """Close the WARC file and its index safely."""
+        self.flush()
+        self.file.close()
+        self.index.close()
+
+
+class WarcControler:
+    lock: threading.Lock
+    sync_lock: threading.Lock
+    file_index: int
+    queue: Queue[PendingRecord | threading.Barrier | None]
+    writers: List[threading.Thread]
     warc_dir: str
     save_interval: int
+    metrics: Metrics
+    closed: bool
+
+    def __init__(self, config: Config, metrics: Metrics) -> None:
+        """Initialize the WARC controller and start its writer threads.
 
-    def __init__(self, config: Config) -> None:
-        """Initialize the WARC controller with a thread lock and first file."""
-        shutil.rmtree(config.corpus_dir)
+        When resuming or recrawling, existing files are kept and new ones are numbered
+        after the last file in the corpus directory.
+        """
+        if not (config.resume or config.recrawl):
+            shutil.rmtree(config.corpus_dir, ignore_errors=True)
         os.makedirs(name=config.corpus_dir, exist_ok=True)
         self.warc_dir = config.corpus_dir
-        self.file_index = 1
-        self.count = 0
+        self.file_index = self._last_file_index()
         self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.closed = False
         self.save_interval = config.save_interval
+        self.metrics = metrics
+        self.queue = Queue(maxsize=WRITE_QUEUE_MAX_SIZE)
 
-        self.file = open(file=self._get_filename(), mode="ab")
-        self.writer = WARCWriter(filebuf=self.file, gzip=True)
+        self.writers = [
+            threading.Thread(target=self._writer_loop, daemon=True)
+            for _ in range(config.warc_writers)
+        ]
+        for writer in self.writers:
+            writer.start()
 
-    def _get_filename(self) -> str:
-        """Return the current WARC filename."""
-        return os.path.join(self.warc_dir, f"crawl_{self.file_index}.warc")
+    def _last_file_index(self) -> int:
+        """Return the highest index among the WARC files already on disk."""
+        indexes: List[int] = [0]
+        for name in os.listdir(self.warc_dir):
+            match = WARC_FILE_PATTERN.match(name)
+            if match:
+                indexes.append(int(match.group(1)))
+        return max(indexes)
 
-    def write(self, url: str, resp: requests.Response) -> None:
-        """Thread-safe writing to the WARC file using warcio."""
+    def _next_file_index(self) -> int:
+        """Reserve the index of the next WARC file to be opened."""
         with self.lock:
-            headers_list = resp.raw.headers.items()
-            http_headers = StatusAndHeaders(
-                statusline='200 OK', headers=headers_list, protocol='HTTP/1.0')
+            self.file_index += 1
+            return self.file_index
 
-            record: ArcWarcRecord = self.writer.create_warc_record(  # type: ignore
-                uri=url,
-                record_type="response",
-                payload=resp.raw,
-                http_headers=http_headers,
-            )
+    def write(self, url: str, resp: requests.Response, payload: bytes) -> None:
+        """Enqueue a fetched page to be written by one of the writer threads."""
+        self.queue.put(PendingRecord(url, self._http_headers(resp), payload))
 
-            self.writer.write_record(record=record)  # type: ignore
+    def write_revisit(self, url: str, resp: requests.Response, revisit: Revisit) -> None:
+        """Enqueue a revisit record for a page unchanged since an earlier capture."""
+        self.queue.put(PendingRecord(
+            url, self._http_headers(resp), b"", revisit))
 
-            self.count += 1
+    def sync(self) -> None:
+        """Block until every record enqueued so far is written and flushed.
 
-            if self.count >= self.save_interval:
-                self.rotate_file()
+        One barrier marker goes to each writer: a writer that takes one flushes
+        its shard and waits, so it cannot take a second marker, and the queue
+        is FIFO, so the records ahead of the markers are written by then.
+        """
+        with self.sync_lock:
+            if self.closed:
+                return
+            barrier = threading.Barrier(len(self.writers) + 1)
+            for _ in self.writers:
+                self.queue.put(barrier)
+            barrier.wait()
 
-    def rotate_file(self) -> None:
-        """Rotate to a new WARC file after reaching the save interval."""
-        print(f"Rotating WARC file: {self.file_index}")
-        self.close()
-        self.file_index += 1
-        self.count = 0
-        self.file = open(file=self._get_filename(), mode="ab")
-        self.writer = WARCWriter(filebuf=self.file, gzip=True)
+    def _http_headers(self, resp: requests.Response) -> StatusAndHeaders:
+        headers_list: List[Tuple[str, str]] = [
+            (name, value) for name, value in resp.headers.items()
+            if name.lower() not in DROPPED_HEADERS
+        ]
+        return StatusAndHeaders(
+            statusline=f"{resp.status_code} {resp.reason}", headers=headers_list, protocol='HTTP/1.0')
+
+    def _writer_loop(self) -> None:
+        """Write queued records in batches, rotating shards as they fill up.
+
+        A shard is opened on its first record, so an idle writer leaves no
+        empty files behind.
+        """
+        shard: WarcShard | None = None
+
+        while True:
+            batch: List[PendingRecord | threading.Barrier | None] = [self.queue.get()]
+            # a shutdown or sync marker always ends the batch so each writer gets one
+            while isinstance(batch[-1], PendingRecord) and len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except Empty:
+                    break
+
+            for pending in batch:
+                if pending is None:
+                    if shard is not None:
+                        shard.close()
+                    return
+                if isinstance(pending, threading.Barrier):
+                    if shard is not None:
+                        shard.flush()
+                    pending.wait()
+                    continue
+
+                if shard is None:
+                    shard = WarcShard(self.warc_dir, self._next_file_index())
+                with self.metrics.time("warc_write"):
+                    shard.write(pending)
+
+                if shard.count >= self.save_interval:
+                    print(f"Rotating WARC file: {shard.file_index}")
+                    shard.close()
+                    shard = None
+
+            if shard is not None:
+                shard.flush()
 
     def close(self) -> None:
-        """Close the current WARC file safely."""
-        self.file.flush()
-        self.file.close()
+        """Write out every queued record and close all shards."""
+        with self.sync_lock:
+            self.closed = True
+        for _ in self.writers:
+            self.queue.put(None)
+        for writer in self.writers:
+            writer.join()
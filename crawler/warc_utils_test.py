@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from warcio.archiveiterator import ArchiveIterator
+from metrics_utils import Metrics
+from warc_utils import WarcControler, CDX_HEADER
+
+
+def config(corpus_dir, warc_writers=2, save_interval=3):
+    return SimpleNamespace(corpus_dir=corpus_dir, resume=False, recrawl=False,
+                           save_interval=save_interval, warc_writers=warc_writers)
+
+
+def response(status=200):
+    return SimpleNamespace(headers={'Content-Type': 'text/html'}, status_code=status, reason='OK')
+
+
+def cdx_entries(corpus_dir):
+    entries = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if name.endswith('.cdx'):
+            with open(os.path.join(corpus_dir, name)) as f:
+                lines = f.readlines()
+            # a shard a writer is still filling may not be flushed yet
+            if lines:
+                assert lines[0] == CDX_HEADER
+            entries.extend(line.split() for line in lines[1:] if line.endswith("\n"))
+    return entries
+
+
+class TestWarcControler(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_cdx_offsets_point_at_their_records(self):
+        warc = WarcControler(config(self.dir), Metrics())
+        urls = [f"http://example.com/{i}" for i in range(20)]
+        for url in urls:
+            warc.write(url, response(), f"<html>{url}</html>".encode())  # type: ignore
+        warc.close()
+
+        entries = cdx_entries(self.dir)
+        self.assertEqual(sorted(e[0] for e in entries), sorted(urls))
+        # rotation: 20 records over shards of at most 3
+        self.assertGreaterEqual(len({e[6] for e in entries}), 7)
+        for url, _, mime, status, length, offset, filename in entries:
+            self.assertEqual((mime, status), ('text/html', '200'))
+            with open(os.path.join(self.dir, filename), 'rb') as f:
+                f.seek(int(offset))
+                record = next(iter(ArchiveIterator(f)))
+                self.assertEqual(record.rec_headers.get_header('WARC-Target-URI'), url)
+                self.assertEqual(record.content_stream().read(), f"<html>{url}</html>".encode())
+            self.assertGreater(int(length), 0)
+
+    def test_idle_writers_leave_no_files(self):
+        warc = WarcControler(config(self.dir, warc_writers=3), Metrics())
+        warc.write("http://example.com/", response(), b"<html></html>")  # type: ignore
+        warc.close()
+        self.assertEqual(sorted(os.listdir(self.dir)), ['crawl_1.cdx', 'crawl_1.warc'])
+
+    def test_sync_writes_every_queued_record(self):
+        warc = WarcControler(config(self.dir, save_interval=50), Metrics())
+        stop = threading.Event()
+
+        def background():
+            i = 0
+            while not stop.is_set():
+                warc.write(f"http://other.com/{i}", response(), b"x" * 1000)  # type: ignore
+                i += 1
+        writer = threading.Thread(target=background)
+        writer.start()
+        try:
+            for round_ in range(5):
+                for i in range(30):
+                    warc.write(f"http://example.com/{round_}-{i}", response(), b"y")  # type: ignore
+                warc.sync()
+                synced = [e for e in cdx_entries(self.dir) if e[0].startswith("http://example.com/")]
+                self.assertEqual(len(synced), 30 * (round_ + 1))
+        finally:
+            stop.set()
+            writer.join()
+            warc.close()
+        warc.sync()  # a no-op once closed
+
+
+if __name__ == '__main__':
+    unittest.main()
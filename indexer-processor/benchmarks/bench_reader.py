@@ -0,0 +1,85 @@
+import os
+import json
+import time
+import argparse
+import multiprocessing
+from typing import Dict, Any, Tuple
+from utils.reader import Reader, BulkReader, split_ranges
+
+
+def _throughput(docs: int, size: int, elapsed: float) -> Dict[str, Any]:
+    return {
+        "docs": docs,
+        "seconds": round(elapsed, 4),
+        "docs_per_second": round(docs / elapsed, 1) if elapsed else 0.0,
+        "mb_per_second": round(size / (1024 * 1024) / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def bench_reader(path: str) -> Dict[str, Any]:
+    """One record per call, as Indexer.build used to read the corpus."""
+    start = time.perf_counter()
+    docs = 0
+    with Reader(path) as reader:
+        while reader.next_line() is not None:
+            docs += 1
+    return _throughput(docs, os.path.getsize(path), time.perf_counter() - start)
+
+
+def bench_bulk(path: str, batch_size: int, fields: Tuple[str, ...] | None = None) -> Dict[str, Any]:
+    start = time.perf_counter()
+    docs = 0
+    with BulkReader(path, fields=fields) as reader:
+        while True:
+            batch = reader.next_batch(batch_size)
+            if not batch:
+                break
+            docs += len(batch)
+    return _throughput(docs, os.path.getsize(path), time.perf_counter() - start)
+
+
+def _count_range(args: Tuple[str, int, int]) -> int:
+    path, start, end = args
+    docs = 0
+    with BulkReader(path, start, end) as reader:
+        while True:
+            batch = reader.next_batch(1000)
+            if not batch:
+                return docs
+            docs += len(batch)
+
+
+def bench_parallel(path: str, parts: int) -> Dict[str, Any]:
+    """Byte-range slices decoded by one process each."""
+    start = time.perf_counter()
+    with multiprocessing.Pool(parts) as pool:
+        docs = sum(pool.map(_count_range, [(path, s, e)
+                   for s, e in split_ranges(path, parts)]))
+    return _throughput(docs, os.path.getsize(path), time.perf_counter() - start)
+
+
+def run(path: str, batch_size: int, parts: int) -> Dict[str, Any]:
+    return {
+        "reader": bench_reader(path),
+        "bulk_reader": bench_bulk(path, batch_size),
+        "bulk_reader_fields": bench_bulk(path, batch_size, ('id', 'title', 'text')),
+        f"bulk_reader_{parts}_ranges": bench_parallel(path, parts),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare the throughput of the JSONL corpus readers")
+    parser.add_argument("-c", "--corpus", help="path to the corpus jsonl file",
+                        type=str, required=True, dest='corpus_path')
+    parser.add_argument("-b", "--batch-size", help="records per next_batch call",
+                        type=int, default=1000, dest='batch_size')
+    parser.add_argument("-p", "--parts", help="number of byte ranges read in parallel",
+                        type=int, default=multiprocessing.cpu_count(), dest='parts')
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.corpus_path, args.batch_size, args.parts), indent=2))
+
+
+if __name__ == '__main__':
+    main()
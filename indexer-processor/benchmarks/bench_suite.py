@@ -0,0 +1,302 @@
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import contextlib
+import statistics
+import multiprocessing
+from typing import Dict, Any, List, Callable, Iterator
+from indexer import Indexer
+from processor import QueryProcessor
+from utils.parser import RecordParser
+from utils.reader import BulkReader
+from utils.wand import wand_query
+from utils.trace import percentile
+from benchmarks.synthetic import generate_corpus, generate_records, generate_queries
+
+# metrics compared against a baseline, and whether a larger value is better
+COMPARED_METRICS: Dict[str, bool] = {
+    "ops_per_second": True,
+    "docs_per_second": True,
+    "queries_per_second": True,
+    "p50_ms": False,
+    "p90_ms": False,
+    "p99_ms": False,
+}
+
+
+def _best_of(fn: Callable[[], Any], repeat: int) -> float:
+    """Fastest of `repeat` runs, in seconds; the minimum is the least noisy."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _rate(ops: int, seconds: float, unit: str = "ops") -> Dict[str, Any]:
+    return {
+        unit: ops,
+        "seconds": round(seconds, 6),
+        f"{unit}_per_second": round(ops / seconds, 1) if seconds else 0.0,
+    }
+
+
+@contextlib.contextmanager
+def _quiet() -> Iterator[None]:
+    # the indexer reports progress on stdout, which would corrupt the JSON
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+@contextlib.contextmanager
+def _chdir(path: str) -> Iterator[None]:
+    # Indexer keeps its partial files in a directory relative to the cwd
+    cwd = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+
+
+def bench_record_parser(records: List[Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    parser = RecordParser()
+
+    def run():
+        for rec in records:
+            parser.parse(rec)
+    return _rate(len(records), _best_of(run, repeat))
+
+
+def _build_phases(corpus_path: str) -> Dict[str, float]:
+    indexer = Indexer(corpus_path, 'phases_index', mem_limit_mb=1024, workers=1)
+    seconds: Dict[str, float] = {}
+
+    start = time.perf_counter()
+    with BulkReader(corpus_path, fields=('id', 'title', 'text')) as reader:
+        records = []
+        while True:
+            batch = reader.next_batch(1000)
+            if not batch:
+                break
+            records.extend(batch)
+    seconds["read"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parsed = [Indexer._parse_record((rec, indexer.parser, False)) for rec in records]
+    seconds["parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for doc_id, freqs, _ in parsed:
+        indexer._add_document(doc_id, freqs)
+    seconds["invert"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexer._flush_partial()
+    seconds["flush"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexer._merge_partials()
+    seconds["merge"] = time.perf_counter() - start
+    return seconds
+
+
+def bench_build_phases(corpus_path: str, workdir: str, docs: int,
+                       repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Each Indexer.build phase timed on its own, in a single process."""
+    best: Dict[str, float] = {}
+    with _chdir(workdir), _quiet():
+        for _ in range(repeat):
+            for phase, seconds in _build_phases(corpus_path).items():
+                best[phase] = min(best.get(phase, float('inf')), seconds)
+    return {f"indexer.{phase}": _rate(docs, seconds, "docs")
+            for phase, seconds in best.items()}
+
+
+def bench_read_postings(qp: QueryProcessor, terms: List[str], repeat: int) -> Dict[str, Any]:
+    def run():
+        for term in terms:
+            qp._read_postings(term)
+    return _rate(len(terms), _best_of(run, repeat))
+
+
+def bench_wand(qp: QueryProcessor, term_lists: List[List[str]], repeat: int) -> Dict[str, Any]:
+    """wand_query alone; postings are read and pointers built outside the timing."""
+    best = [float('inf')] * len(term_lists)
+    for _ in range(repeat):
+        for i, toks in enumerate(term_lists):
+            pointers = qp._build_pointers(toks)
+            start = time.perf_counter()
+            wand_query(pointers, qp.page_size, qp._score)
+            best[i] = min(best[i], time.perf_counter() - start)
+    return _rate(len(term_lists), sum(best))
+
+
+def bench_indexing(corpus_path: str, index_dir: str, workdir: str, workers: int,
+                   mem_limit_mb: int, docs: int) -> Dict[str, Any]:
+    """Indexer.build end to end, including the process pool and the merge."""
+    with _chdir(workdir), _quiet():
+        start = time.perf_counter()
+        Indexer(corpus_path, index_dir, mem_limit_mb, workers).build()
+        elapsed = time.perf_counter() - start
+    return _rate(docs, elapsed, "docs")
+
+
+def bench_queries(qp: QueryProcessor, queries: List[str]) -> Dict[str, Any]:
+    """process_query end to end: parsing, postings reads, scoring and ranking."""
+    for query in queries[:10]:
+        qp.process_query(query)  # warm the page cache
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        qp.process_query(query)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    result = _rate(len(queries), sum(latencies), "queries")
+    result.update({
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    })
+    return result
+
+
+def run(config: Dict[str, Any]) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix='bench_')
+    try:
+        corpus_path = os.path.join(workdir, 'corpus.jsonl')
+        corpus_bytes = generate_corpus(corpus_path, config["docs"], config["vocab_size"],
+                                       config["doc_len"], config["zipf_s"], config["seed"])
+        records = generate_records(min(config["docs"], 1000), config["vocab_size"],
+                                   config["doc_len"], config["zipf_s"], config["seed"])
+        queries = generate_queries(config["queries"], config["vocab_size"],
+                                   config["zipf_s"], config["seed"])
+
+        benchmarks: Dict[str, Dict[str, Any]] = {}
+        benchmarks["record_parser.parse"] = bench_record_parser(records, config["repeat"])
+        benchmarks.update(bench_build_phases(
+            corpus_path, workdir, config["docs"], config["repeat"]))
+
+        index_dir = os.path.join(workdir, 'index')
+        benchmarks["indexer.build"] = bench_indexing(
+            corpus_path, index_dir, workdir, config["workers"],
+            config["mem_limit_mb"], config["docs"])
+
+        qp = QueryProcessor(index_dir, config["ranker"], config["top"])
+        try:
+            term_lists = [qp.parser.parse({'title': q, 'text': ''}) for q in queries]
+            terms = [term for toks in term_lists for term in toks]
+            benchmarks["processor.read_postings"] = bench_read_postings(
+                qp, terms, config["repeat"])
+            benchmarks["wand_query"] = bench_wand(qp, term_lists, config["repeat"])
+            benchmarks["processor.process_query"] = bench_queries(qp, queries)
+            benchmarks["processor.process_query_and"] = bench_queries(
+                qp, [' AND '.join(q.split()) for q in queries])
+        finally:
+            qp.inv_file.close()
+    finally:
+        shutil.rmtree(workdir)
+
+    return {
+        "config": config,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": multiprocessing.cpu_count(),
+            "corpus_bytes": corpus_bytes,
+        },
+        "benchmarks": benchmarks,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> Dict[str, Any]:
+    """Relative change of every compared metric; worse than `tolerance` is a regression."""
+    changes: List[Dict[str, Any]] = []
+    for name, metrics in current["benchmarks"].items():
+        base_metrics = baseline["benchmarks"].get(name, {})
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if metric not in metrics or not base_metrics.get(metric):
+                continue
+            change = metrics[metric] / base_metrics[metric] - 1
+            worse = -change if higher_is_better else change
+            changes.append({
+                "benchmark": name,
+                "metric": metric,
+                "baseline": base_metrics[metric],
+                "current": metrics[metric],
+                "change": round(change, 4),
+                "regression": worse > tolerance,
+            })
+    return {
+        "tolerance": tolerance,
+        "changes": changes,
+        "regressions": sum(c["regression"] for c in changes),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the indexer and query processor on a synthetic corpus")
+    parser.add_argument("-d", "--docs", help="number of synthetic documents",
+                        type=int, default=5000, dest='docs')
+    parser.add_argument("-v", "--vocab-size", help="number of distinct words",
+                        type=int, default=50000, dest='vocab_size')
+    parser.add_argument("-l", "--doc-len", help="average number of words per document",
+                        type=int, default=80, dest='doc_len')
+    parser.add_argument("-z", "--zipf", help="exponent of the Zipfian term distribution",
+                        type=float, default=1.0, dest='zipf_s')
+    parser.add_argument("-n", "--queries", help="number of synthetic queries",
+                        type=int, default=200, dest='queries')
+    parser.add_argument("-s", "--seed", help="seed of the corpus and query generators",
+                        type=int, default=0, dest='seed')
+    parser.add_argument("-r", "--ranker", help="ranking function of the query benchmarks",
+                        choices=["TFIDF", "BM25"], type=str, default="BM25", dest='ranker')
+    parser.add_argument("-t", "--top", help="number of results per query",
+                        type=int, default=10, dest='top')
+    parser.add_argument("-w", "--workers", help="indexer worker processes",
+                        type=int, default=multiprocessing.cpu_count(), dest='workers')
+    parser.add_argument("-m", "--memory", help="indexer memory limit in MB",
+                        type=int, default=1024, dest='mem_limit_mb')
+    parser.add_argument("--repeat", help="runs per microbenchmark, the fastest is kept",
+                        type=int, default=3, dest='repeat')
+    parser.add_argument("-o", "--output", help="also write the results to this file",
+                        type=str, default=None, dest='output')
+    parser.add_argument("-b", "--baseline", help="results file to compare against",
+                        type=str, default=None, dest='baseline')
+    parser.add_argument("--tolerance", help="relative slowdown reported as a regression",
+                        type=float, default=0.1, dest='tolerance')
+    args = vars(parser.parse_args())
+    output, baseline_path, tolerance = args.pop('output'), args.pop('baseline'), args.pop('tolerance')
+
+    baseline = None
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline["config"] != args:
+            parser.error("the baseline was run with a different configuration: "
+                         f"{json.dumps(baseline['config'])}")
+
+    results = run(args)
+    if baseline is not None:
+        results["comparison"] = compare(results, baseline, tolerance)
+        results["comparison"]["baseline"] = baseline_path
+
+    print(json.dumps(results, indent=2))
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if baseline is not None and results["comparison"]["regressions"]:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
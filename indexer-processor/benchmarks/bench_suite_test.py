@@ -0,0 +1,29 @@
+import unittest
+from .bench_suite import compare
+
+
+def results(**metrics):
+    return {"benchmarks": {"b": metrics}}
+
+
+class TestCompare(unittest.TestCase):
+    def test_throughput_drop_is_regression(self):
+        out = compare(results(ops_per_second=80.0), results(ops_per_second=100.0), 0.1)
+        self.assertEqual(out["regressions"], 1)
+        self.assertEqual(out["changes"][0]["change"], -0.2)
+
+    def test_latency_drop_is_improvement(self):
+        out = compare(results(p99_ms=5.0), results(p99_ms=10.0), 0.1)
+        self.assertEqual(out["regressions"], 0)
+
+    def test_latency_rise_within_tolerance(self):
+        out = compare(results(p50_ms=10.5), results(p50_ms=10.0), 0.1)
+        self.assertEqual(out["regressions"], 0)
+
+    def test_unknown_and_missing_metrics_ignored(self):
+        out = compare(results(seconds=9.0, p90_ms=1.0), {"benchmarks": {}}, 0.1)
+        self.assertEqual(out["changes"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
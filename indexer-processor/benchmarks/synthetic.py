@@ -0,0 +1,85 @@
+import json
+import random
+import itertools
+from typing import List, Dict, Any
+
+CONSONANTS = "bcdfghjklmnprstvz"
+VOWELS = "aeiou"
+SYLLABLES = [c + v for c in CONSONANTS for v in VOWELS]
+
+
+def vocabulary(size: int) -> List[str]:
+    """`size` distinct pronounceable words; rank 0 is the most frequent.
+
+    Words are made of syllables so they go through the stemmer like real
+    text, and have at least two syllables so few of them are stopwords.
+    """
+    words = []
+    base = len(SYLLABLES)
+    for rank in range(size):
+        n = rank + base  # skip the one-syllable words
+        parts = []
+        while n:
+            n, r = divmod(n, base)
+            parts.append(SYLLABLES[r])
+        words.append(''.join(reversed(parts)))
+    return words
+
+
+class ZipfSampler:
+    """Draws words with probability proportional to 1 / rank ** s."""
+    words: List[str]
+    _cum_weights: List[float]
+    _rng: random.Random
+
+    def __init__(self, words: List[str], s: float, seed: int):
+        self.words = words
+        self._cum_weights = list(itertools.accumulate(
+            1.0 / (rank ** s) for rank in range(1, len(words) + 1)))
+        self._rng = random.Random(seed)
+
+    def sample(self, k: int) -> List[str]:
+        return self._rng.choices(self.words, cum_weights=self._cum_weights, k=k)
+
+    def randint(self, a: int, b: int) -> int:
+        return self._rng.randint(a, b)
+
+
+def generate_records(docs: int, vocab_size: int, doc_len: int,
+                     zipf_s: float = 1.0, seed: int = 0) -> List[Dict[str, Any]]:
+    """Records shaped like the entity corpus, with Zipfian term frequencies.
+
+    Document lengths are uniform in [doc_len / 2, 3 * doc_len / 2]. The
+    same arguments always produce the same records.
+    """
+    sampler = ZipfSampler(vocabulary(vocab_size), zipf_s, seed)
+    records = []
+    for doc_id in range(docs):
+        length = sampler.randint(max(1, doc_len // 2), max(1, doc_len * 3 // 2))
+        records.append({
+            "id": f"{doc_id:07d}",
+            "title": ' '.join(sampler.sample(sampler.randint(1, 6))).title(),
+            "text": ' '.join(sampler.sample(length)),
+            "keywords": sampler.sample(3),
+        })
+    return records
+
+
+def generate_corpus(path: str, docs: int, vocab_size: int, doc_len: int,
+                    zipf_s: float = 1.0, seed: int = 0) -> int:
+    """Write a synthetic JSONL corpus and return its size in bytes."""
+    with open(path, 'w') as f:
+        for rec in generate_records(docs, vocab_size, doc_len, zipf_s, seed):
+            f.write(json.dumps(rec) + "\n")
+        return f.tell()
+
+
+def generate_queries(count: int, vocab_size: int, zipf_s: float = 1.0,
+                     seed: int = 0) -> List[str]:
+    """Queries of one to four terms drawn from the corpus distribution.
+
+    A different seed stream than the corpus is used, so queries do not
+    simply repeat the first documents.
+    """
+    sampler = ZipfSampler(vocabulary(vocab_size), zipf_s, seed + 1)
+    return [' '.join(sampler.sample(sampler.randint(1, 4))) for _ in range(count)]
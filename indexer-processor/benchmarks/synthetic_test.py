@@ -0,0 +1,45 @@
+import os
+import json
+import tempfile
+import unittest
+from collections import Counter
+from .synthetic import vocabulary, generate_records, generate_corpus, generate_queries
+
+
+class TestSynthetic(unittest.TestCase):
+    def test_vocabulary_distinct(self):
+        words = vocabulary(5000)
+        self.assertEqual(len(set(words)), 5000)
+        self.assertTrue(all(len(w) >= 4 and w.isalpha() for w in words))
+
+    def test_deterministic(self):
+        self.assertEqual(generate_records(50, 1000, 20, seed=3),
+                         generate_records(50, 1000, 20, seed=3))
+        self.assertNotEqual(generate_records(50, 1000, 20, seed=3),
+                            generate_records(50, 1000, 20, seed=4))
+        self.assertEqual(generate_queries(20, 1000, seed=3),
+                         generate_queries(20, 1000, seed=3))
+
+    def test_zipfian_frequencies(self):
+        words = vocabulary(1000)
+        counts = Counter(
+            w for rec in generate_records(200, 1000, 50) for w in rec['text'].split())
+        # rank 1 is about twice as frequent as rank 2 and ten times rank 10
+        self.assertGreater(counts[words[0]], 1.5 * counts[words[1]])
+        self.assertGreater(counts[words[0]], 5 * counts[words[9]])
+
+    def test_corpus_file(self):
+        fd, path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+        try:
+            size = generate_corpus(path, 10, 100, 5)
+            self.assertEqual(size, os.path.getsize(path))
+            with open(path) as f:
+                ids = [json.loads(line)['id'] for line in f]
+            self.assertEqual(ids, [f"{i:07d}" for i in range(10)])
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,36 +3,65 @@ import json
 import time
 import psutil
 import multiprocessing
-from typing import Dict, Tuple, Any
+from typing import Dict, Tuple, Any, List
 from utils.cli import CliIndexer
-from utils.reader import Reader
+from utils.reader import BulkReader, WarcReader
 from utils.parser import RecordParser
+from utils.positions import encode_positions, encode_term_positions
+from utils.docstore import DocStore, DocStoreWriter
 
 tmp_dir = ".tmp_partial"
 
 
 class Indexer:
-    def __init__(self, corpus_path: str, index_dir: str, mem_limit_mb: int, workers: int | None = None):
+    def __init__(self, corpus_path: str, index_dir: str, mem_limit_mb: int, workers: int | None = None,
+                 positions: bool = False, doc_store: bool = False):
         self.corpus_path = corpus_path
         self.index_dir = index_dir
         self.mem_limit = mem_limit_mb * 1024 * 1024
         self.parser = RecordParser()
         self.partial_count = 0
         self.in_memory: Dict[str, Dict[int, int]] = {}
+        self.positions = positions
+        # term -> doc -> gap-encoded positions, only filled with `positions`
+        self.in_memory_pos: Dict[str, Dict[int, bytes]] = {}
+        self.doc_store = doc_store
         self.doc_index: Dict[int, int] = {}
         self.workers = workers or multiprocessing.cpu_count()
         os.makedirs(tmp_dir, exist_ok=True)
         os.makedirs(self.index_dir, exist_ok=True)
 
     @staticmethod
-    def _parse_record(args: Tuple[Dict[str, Any], Any]) -> Tuple[int, Dict[str, int]]:
-        rec, parser = args
+    def _parse_record(args: Tuple[Dict[str, Any], Any, bool]) -> Tuple[int, Dict[str, int], Dict[str, bytes] | None]:
+        rec, parser, with_positions = args
         doc_id = int(rec.get('id', -1))
-        toks = parser.parse(rec)
         freqs: Dict[str, int] = {}
-        for tok in toks:
+        if not with_positions:
+            for tok in parser.parse(rec):
+                freqs[tok] = freqs.get(tok, 0) + 1
+            return doc_id, freqs, None
+        term_positions: Dict[str, List[int]] = {}
+        for tok, pos in parser.parse_positions(rec):
             freqs[tok] = freqs.get(tok, 0) + 1
-        return doc_id, freqs
+            term_positions.setdefault(tok, []).append(pos)
+        # encoded in the worker, so the main process only keeps compact bytes
+        return doc_id, freqs, {term: encode_positions(p) for term, p in term_positions.items()}
+
+    def _open_reader(self) -> BulkReader | WarcReader:
+        """A directory is read as the crawler's WARC files, anything else as JSONL."""
+        if os.path.isdir(self.corpus_path):
+            return WarcReader(self.corpus_path, self.workers)
+        return BulkReader(self.corpus_path, fields=('id', 'title', 'text', 'url'))
+
+    def _add_document(self, doc_id: int, freqs: Dict[str, int],
+                      positions: Dict[str, bytes] | None = None) -> None:
+        self.doc_index[doc_id] = sum(freqs.values())
+        for term, freq in freqs.items():
+            postings = self.in_memory.setdefault(term, {})
+            postings[doc_id] = freq
+        if positions is not None:
+            for term, encoded in positions.items():
+                self.in_memory_pos.setdefault(term, {})[doc_id] = encoded
 
     def _check_memory(self) -> bool:
         rss = psutil.Process(os.getpid()).memory_info().rss
@@ -43,9 +72,13 @@ class Indexer:
         path = os.path.join(tmp_dir, f"partial_{self.partial_count}.jsonl")
         with open(path, 'w') as f:
             for term, postings in sorted(self.in_memory.items()):
-                entry = {"term": term, "postings": postings}
+                entry: Dict[str, Any] = {"term": term, "postings": postings}
+                if self.positions:
+                    entry["positions"] = {
+                        doc: encoded.hex() for doc, encoded in self.in_memory_pos[term].items()}
                 f.write(json.dumps(entry) + "\n")
         self.in_memory.clear()
+        self.in_memory_pos.clear()
         self.partial_count += 1
         print(f"Flushed partial index #{self.partial_count} to disk.")
 
@@ -53,22 +86,21 @@ class Indexer:
         start = time.time()
         count = 0
         pool = multiprocessing.Pool(self.workers)
+        store = DocStoreWriter(self.index_dir) if self.doc_store else None
+        if store is None:
+            DocStore.remove(self.index_dir)
         try:
-            with Reader(self.corpus_path) as reader:
+            with self._open_reader() as reader:
                 while True:
-                    batch = []
-                    for _ in range(batch_size):
-                        rec = reader.next_line()
-                        if rec is None:
-                            break
-                        batch.append((rec, self.parser))
+                    batch = [(rec, self.parser, self.positions)
+                             for rec in reader.next_batch(batch_size)]
                     if not batch:
                         break
-                    for doc_id, freqs in pool.map(Indexer._parse_record, batch):
-                        self.doc_index[doc_id] = sum(freqs.values())
-                        for term, freq in freqs.items():
-                            postings = self.in_memory.setdefault(term, {})
-                            postings[doc_id] = freq
+                    if store is not None:
+                        for rec, _, _ in batch:
+                            store.add(int(rec.get('id', -1)), rec)
+                    for doc_id, freqs, positions in pool.map(Indexer._parse_record, batch):
+                        self._add_document(doc_id, freqs, positions)
                         count += 1
                     if count % (batch_size * 10) == 0:
                         print(f"Processed {count} docs...")
@@ -79,6 +111,8 @@ class Indexer:
         finally:
             pool.close()
             pool.join()
+            if store is not None:
+                store.close()
 
         self._merge_partials()
         elapsed = time.time() - start
@@ -94,6 +128,7 @@ class Indexer:
     def _merge_partials(self) -> None:
         partials = sorted(os.listdir(tmp_dir))
         merged: Dict[str, Dict[int, int]] = {}
+        merged_pos: Dict[str, Dict[int, bytes]] = {}
         for fname in partials:
             with open(os.path.join(tmp_dir, fname)) as f:
                 for line in f:
@@ -101,16 +136,33 @@ class Indexer:
                     term = entry['term']
                     for doc, freq in entry['postings'].items():
                         merged.setdefault(term, {})[int(doc)] = freq
+                    for doc, encoded in entry.get('positions', {}).items():
+                        merged_pos.setdefault(term, {})[int(doc)] = bytes.fromhex(encoded)
         inv_path = os.path.join(self.index_dir, 'inverted_index.jsonl')
+        pos_path = os.path.join(self.index_dir, 'positions.bin')
+        pos_f = open(pos_path, 'wb') if self.positions else None
+        if pos_f is None and os.path.exists(pos_path):
+            # left over from an earlier build with positions
+            os.remove(pos_path)
         lexicon: Dict[str, Dict] = {}
-        with open(inv_path, 'w') as inv_f:
-            for term, postings in sorted(merged.items()):
-                offset = inv_f.tell()
-                inv_f.write(json.dumps(
-                    {"term": term, "postings": postings}) + "\n")
-                length = inv_f.tell() - offset
-                lexicon[term] = {
-                    "df": len(postings), "offset": offset, "length": length}
+        try:
+            with open(inv_path, 'w') as inv_f:
+                for term, postings in sorted(merged.items()):
+                    offset = inv_f.tell()
+                    inv_f.write(json.dumps(
+                        {"term": term, "postings": postings}) + "\n")
+                    length = inv_f.tell() - offset
+                    lexicon[term] = {
+                        "df": len(postings), "offset": offset, "length": length}
+                    if pos_f is not None:
+                        term_pos = merged_pos[term]
+                        block = encode_term_positions([term_pos[doc] for doc in sorted(term_pos)])
+                        lexicon[term]["pos_offset"] = pos_f.tell()
+                        lexicon[term]["pos_length"] = len(block)
+                        pos_f.write(block)
+        finally:
+            if pos_f is not None:
+                pos_f.close()
         with open(os.path.join(self.index_dir, 'term_lexicon.json'), 'w') as lex_f:
             json.dump(lexicon, lex_f)
         with open(os.path.join(self.index_dir, 'document_index.json'), 'w') as doc_f:
@@ -136,7 +188,7 @@ def main() -> None:
     args = CliIndexer()
     workers = args.workers
     indexer = Indexer(args.corpus_path, args.index_dir,
-                      args.available_memory, workers)
+                      args.available_memory, workers, args.positions, args.doc_store)
     indexer.build()
 
 
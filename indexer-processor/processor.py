@@ -1,14 +1,53 @@
 import os
+import html
+import heapq
 import numpy as np
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from utils.cli import CliProcessor
-from utils.parser import RecordParser
-from utils.wand import WandTermPointer, wand_query
+from utils.parser import RecordParser, QueryParser, TermNode, PhraseNode, Node
+from utils.parser import disjunctive_terms, positive_terms, all_terms
+from utils.wand import DocCursor, WandTermPointer, wand_query, intersect, union, exclude
+from utils.positions import PositionsFile, TermPositions, phrase_count, min_distance
+from utils.docstore import DocStore, snippet
+from utils.trace import QueryTrace
+
+# with a proximity boost, this many times the page size is ranked first and re-ranked
+PROXIMITY_DEPTH = 4
+
+
+class QueryTerms:
+    """Postings of one query's terms; doc-ID arrays and positions are built on first use."""
+    postings: Dict[str, Dict[int, int]]
+    _qp: 'QueryProcessor'
+    _trace: QueryTrace | None
+    _doc_ids: Dict[str, np.ndarray]
+    _positions: Dict[str, TermPositions]
+
+    def __init__(self, qp: 'QueryProcessor', terms: List[str], trace: QueryTrace | None = None):
+        self._qp = qp
+        self._trace = trace
+        self.postings = {term: qp._read_postings(term, trace) for term in terms}
+        self._doc_ids = {}
+        self._positions = {}
+
+    def doc_ids(self, term: str) -> np.ndarray:
+        if term not in self._doc_ids:
+            self._doc_ids[term] = np.array(sorted(self.postings[term]), dtype=np.int32)
+        return self._doc_ids[term]
+
+    def positions(self, term: str) -> TermPositions:
+        if term not in self._positions:
+            entry = self._qp.lexicon[term]
+            self._positions[term] = self._qp.positions.term(  # type: ignore
+                entry, self.postings[term])
+            if self._trace is not None:
+                self._trace.count('positions_bytes', entry['pos_length'])
+        return self._positions[term]
 
 
 class QueryProcessor:
-    def __init__(self, index_dir: str, ranker: str, page_size: int) -> None:
+    def __init__(self, index_dir: str, ranker: str, page_size: int, proximity: float = 0.0) -> None:
         self.index_dir: str = index_dir
         self.ranker: str = ranker.upper()
         with open(os.path.join(index_dir, 'term_lexicon.json'), 'r') as f:
@@ -19,20 +58,41 @@ class QueryProcessor:
         self.N = len(self.doc_index)
         self.avg_doc_len = sum(self.doc_index.values()) / self.N
         self.parser = RecordParser()
+        self.query_parser = QueryParser(
+            lambda word: self.parser.parse({'title': word, 'text': ''}),
+            lambda phrase: self.parser.parse_positions({'title': phrase, 'text': ''}))
         self.k1 = 1.5
         self.b = 0.75
         self.inv_file = open(os.path.join(
             index_dir, 'inverted_index.jsonl'), 'r')
         self.page_size: int = page_size
+        # the lexicon, not the file, tells whether the index was built with positions:
+        # the merge adds pos_offset to every entry or to none
+        first_entry = next(iter(self.lexicon.values()), {})
+        pos_path = os.path.join(index_dir, 'positions.bin')
+        self.positions: PositionsFile | None = (
+            PositionsFile(pos_path) if 'pos_offset' in first_entry and os.path.exists(pos_path)
+            else None)
+        if proximity and self.positions is None:
+            raise ValueError("a proximity boost needs an index built with --positions")
+        self.proximity: float = proximity
+        self.doc_store: DocStore | None = DocStore(index_dir) if DocStore.exists(index_dir) else None
 
-    def _read_postings(self, term: str) -> Dict[int, int]:
+    def _read_postings(self, term: str, trace: QueryTrace | None = None) -> Dict[int, int]:
         entry = self.lexicon.get(term)
         if not entry:
             return {}
         self.inv_file.seek(entry['offset'])
         line = self.inv_file.readline()
+        if trace is not None:
+            trace.lap('read')
+            trace.count('postings_bytes', entry['length'])
         data = json.loads(line)
-        return {int(doc): freq for doc, freq in data['postings'].items()}
+        postings = {int(doc): freq for doc, freq in data['postings'].items()}
+        if trace is not None:
+            trace.lap('decode')
+            trace.count('postings_decoded', len(postings))
+        return postings
 
     def _score_bm25(self, term: str, freq: int, doc_len: int) -> float:
         df = self.lexicon[term]['df']
@@ -48,14 +108,20 @@ class QueryProcessor:
         idf = np.log((self.N) / df)
         return tf * idf
 
-    def process_query(self, query: str) -> Dict:
-        toks = self.parser.parse({'title': query, 'text': ''})
-        if not toks:
-            return {'Query': query, 'Results': []}
+    def _score(self, term: str, freq: int, doc_id: int) -> float:
+        doc_len = self.doc_index[doc_id]
+
+        if self.ranker == 'TFIDF':
+            return self._score_tfidf(term, freq, doc_len)
 
+        return self._score_bm25(term, freq, doc_len)
+
+    def _build_pointers(self, toks: List[str], trace: QueryTrace | None = None,
+                        terms: QueryTerms | None = None) -> List[WandTermPointer]:
         pointers: List[WandTermPointer] = []
         for term in toks:
-            postings: Dict[int, int] = self._read_postings(term)
+            postings: Dict[int, int] = (terms.postings[term] if terms is not None
+                                        else self._read_postings(term, trace))
             if not postings:
                 continue
 
@@ -66,36 +132,162 @@ class QueryProcessor:
                 ub = max(self._score_bm25(
                     term, f, self.doc_index[doc]) for doc, f in postings.items())
             pointers.append(WandTermPointer(term, postings, ub))
+            if trace is not None:
+                trace.lap('upper_bound')
+        return pointers
 
-        def score_fn(term: str, freq: int, doc_id: int) -> float:
-            doc_len = self.doc_index[doc_id]
+    def _match(self, node: Node, terms: QueryTerms, trace: QueryTrace | None = None) -> np.ndarray:
+        """Sorted IDs of the docs matching `node`."""
+        if isinstance(node, TermNode):
+            return terms.doc_ids(node.term)
+        if isinstance(node, PhraseNode):
+            return self._match_phrase(node, terms, trace)
+        if node.must:
+            matches = intersect([DocCursor(self._match(child, terms, trace)) for child in node.must])
+        else:
+            matches = union([DocCursor(self._match(child, terms, trace)) for child in node.should])
+        if node.must_not and len(matches):
+            matches = exclude(matches, [DocCursor(self._match(child, terms, trace))
+                                        for child in node.must_not])
+        return matches
 
-            if self.ranker == 'TFIDF':
-                return self._score_tfidf(term, freq, doc_len)
+    def _match_phrase(self, node: PhraseNode, terms: QueryTerms,
+                      trace: QueryTrace | None = None) -> np.ndarray:
+        """Docs with the phrase; positions are decoded only for docs holding every term.
 
-            return self._score_bm25(term, freq, doc_len)
+        Without a positional index a phrase degrades to an AND of its terms.
+        """
+        candidates = intersect([DocCursor(terms.doc_ids(term)) for term in dict.fromkeys(node.terms)])
+        if self.positions is None or not len(candidates):
+            return candidates
+        term_positions = [terms.positions(term) for term in node.terms]
+        matches = [doc for doc in candidates.tolist()
+                   if phrase_count([tp.get(doc) for tp in term_positions], node.offsets)]
+        if trace is not None:
+            trace.count('phrase_candidates', len(candidates))
+        return np.array(matches, dtype=np.int32)
 
-        top_k = wand_query(pointers, self.page_size, score_fn)
+    def _boolean_query(self, node: Node, terms: QueryTerms, k: int,
+                       trace: QueryTrace | None = None) -> List[Tuple[float, int]]:
+        """Match the docs exactly, then score only those.
+
+        The doc-ID arrays and set operations decide the matches, so unlike
+        the WAND path no upper bounds are computed and docs outside the
+        intersection are never scored.
+        """
+        matches = self._match(node, terms, trace).tolist()
+        if trace is not None:
+            trace.lap('match')
+            trace.count('docs_scored', len(matches))
+
+        scoring = [(term, terms.postings[term]) for term in positive_terms(node)]
+        scored = (
+            (sum(self._score(term, term_postings[doc], doc)
+                 for term, term_postings in scoring if doc in term_postings), doc)
+            for doc in matches
+        )
+        top_k = heapq.nlargest(k, scored)
+        if trace is not None:
+            trace.lap('score')
+        return top_k
+
+    def _proximity_rerank(self, top_k: List[Tuple[float, int]], query_terms: List[str],
+                          terms: QueryTerms, trace: QueryTrace | None = None) -> List[Tuple[float, int]]:
+        """Add `proximity / d**2` for each pair of consecutive query terms
+        found `d` positions apart, then keep the best page.
+
+        Only the already ranked candidates have their positions decoded.
+        """
+        boosted = []
+        for score, doc in top_k:
+            present = [term for term in query_terms if doc in terms.postings[term]]
+            bonus = 0.0
+            for a, b in zip(present, present[1:]):
+                distance = min_distance(terms.positions(a).get(doc), terms.positions(b).get(doc))
+                if distance:
+                    bonus += 1.0 / (distance * distance)
+            boosted.append((score + self.proximity * bonus, doc))
+        if trace is not None:
+            trace.lap('proximity')
+        return heapq.nlargest(self.page_size, boosted)
+
+    def _add_snippets(self, results: List[Dict[str, Any]], top_k: List[Tuple[float, int]],
+                      query_terms: List[str], trace: QueryTrace | None = None) -> None:
+        """Title and query-highlighted snippet of each hit, from the document store."""
+        for result, (_, doc) in zip(results, top_k):
+            record = self.doc_store.get(doc, trace) or {}  # type: ignore
+            # both fields are HTML, like the snippet's highlight tags
+            result['Title'] = html.escape(record.get('title', ''))
+            result['Snippet'] = snippet(record.get('text', ''), query_terms, self.parser.normalize)
+        if trace is not None:
+            trace.lap('snippets')
+
+    def process_query(self, query: str, trace: QueryTrace | None = None) -> Dict:
+        """Rank the top documents for `query`, recording into `trace` when one is given.
+
+        Plain queries, i.e. ORs of terms, run on WAND; queries with
+        required, excluded, AND'ed or phrase parts are matched exactly first.
+        """
+        node = self.query_parser.parse(query)
+        if trace is not None:
+            trace.lap('tokenize')
+        if node is None:
+            return {'Query': query, 'Results': []}
+
+        k = self.page_size * PROXIMITY_DEPTH if self.proximity else self.page_size
+        toks = disjunctive_terms(node)
+        if toks is not None:
+            query_terms = list(dict.fromkeys(toks))
+            if trace is not None:
+                trace.count('terms', len(toks))
+            terms = QueryTerms(self, query_terms, trace) if self.proximity else None
+            pointers = self._build_pointers(toks, trace, terms)
+            top_k = wand_query(pointers, k, self._score, trace)
+            if trace is not None:
+                trace.lap('wand')
+        else:
+            query_terms = positive_terms(node)
+            if trace is not None:
+                trace.count('terms', len(all_terms(node)))
+            terms = QueryTerms(self, all_terms(node), trace)
+            top_k = self._boolean_query(node, terms, k, trace)
+        if self.proximity:
+            top_k = self._proximity_rerank(top_k, query_terms, terms, trace)  # type: ignore
         results = [
             {
                 'ID': f"{doc:07d}",
                 'Score': round(score, 4)
             } for score, doc in top_k
         ]
+        if trace is not None:
+            trace.lap('format')
+        if self.doc_store is not None:
+            self._add_snippets(results, top_k, query_terms, trace)
 
         return {'Query': query, 'Results': results}
 
 
 def main() -> None:
     args = CliProcessor()
-    qp = QueryProcessor(args.index_path, args.ranker, args.page_size)
-    with open(args.queries_path) as qf:
-        for line in qf:
-            query = line.strip()
-            if not query:
-                continue
-            output: Dict[Any, Any] = qp.process_query(query)
-            print(json.dumps(output))
+    qp = QueryProcessor(args.index_path, args.ranker, args.page_size, args.proximity)
+    trace_file = open(args.trace_file, 'w') if args.trace_file else None
+    try:
+        with open(args.queries_path) as qf:
+            for line in qf:
+                query = line.strip()
+                if not query:
+                    continue
+                trace = QueryTrace(query) if args.trace or trace_file else None
+                output: Dict[Any, Any] = qp.process_query(query, trace)
+                if trace is not None:
+                    if args.trace:
+                        output['Trace'] = trace.to_dict()
+                    if trace_file:
+                        trace_file.write(json.dumps(trace.to_dict()) + "\n")
+                print(json.dumps(output))
+    finally:
+        if trace_file:
+            trace_file.close()
 
 
 if __name__ == '__main__':
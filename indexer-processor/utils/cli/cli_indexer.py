@@ -6,6 +6,8 @@ class CliIndexer:
     index_dir: str
     available_memory: int
     workers: int
+    positions: bool
+    doc_store: bool
 
     def __init__(self):
         parser = argparse.ArgumentParser()
@@ -13,7 +15,7 @@ class CliIndexer:
         parser.add_argument(
             "-c",
             "--corpus",
-            help="path to the corpus jsonl file to be indexed",
+            help="path to the corpus jsonl file, or directory of crawl_N.warc files, to be indexed",
             type=str,
             required=False,
             default="corpus.jsonl",
@@ -46,5 +48,17 @@ class CliIndexer:
             default=0,
             dest='workers',
         )
+        parser.add_argument(
+            "--positions",
+            help="also store term positions, for phrase queries and proximity ranking",
+            action="store_true",
+            dest='positions',
+        )
+        parser.add_argument(
+            "--doc-store",
+            help="also store compressed titles and texts, for result snippets",
+            action="store_true",
+            dest='doc_store',
+        )
 
         parser.parse_args(namespace=self)
@@ -6,6 +6,9 @@ class CliProcessor:
     index_path: str
     ranker: str
     page_size: int
+    trace: bool
+    trace_file: str | None
+    proximity: float
 
     def __init__(self) -> None:
         parser = argparse.ArgumentParser()
@@ -44,5 +47,27 @@ class CliProcessor:
             default=10,
             dest='page_size'
         )
+        parser.add_argument(
+            "--trace",
+            help="add per-query phase timings and counters to each result",
+            action="store_true",
+            dest='trace',
+        )
+        parser.add_argument(
+            "--trace-file",
+            help="write per-query traces as JSON lines to this file",
+            type=str,
+            required=False,
+            default=None,
+            dest='trace_file',
+        )
+        parser.add_argument(
+            "--proximity",
+            help="weight of the term proximity boost, needs an index built with --positions",
+            type=float,
+            required=False,
+            default=0.0,
+            dest='proximity',
+        )
 
         parser.parse_args(namespace=self)
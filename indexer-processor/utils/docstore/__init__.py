@@ -0,0 +1,2 @@
+from .doc_store import *
+from .snippet import *
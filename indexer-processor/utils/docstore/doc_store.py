@@ -0,0 +1,170 @@
+from typing import Dict, Any, List, Deque
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import json
+import mmap
+import os
+import zlib
+import numpy as np
+from ..trace import QueryTrace
+
+STORE_FILE = 'documents.bin'
+OFFSETS_FILE = 'documents_offsets.npz'
+# uncompressed bytes per block: large enough for zlib to find redundancy,
+# small enough that a hit decompresses little besides its own record
+BLOCK_BYTES = 64 * 1024
+# bounds the slot numbers, which are stored as uint16, for runs of tiny records
+MAX_BLOCK_DOCS = 1024
+COMPRESSION_LEVEL = 6
+MAX_PENDING_BLOCKS = 4
+CACHE_BLOCKS = 64
+STORED_FIELDS = ('title', 'text', 'url')
+
+
+class DocStoreWriter:
+    """Appends records to zlib-compressed blocks of a JSON array each.
+
+    Blocks are compressed on a background thread (zlib releases the GIL)
+    while the indexer keeps parsing. `close` writes the doc-ID table:
+    sorted doc IDs with the block and slot of each, plus block offsets.
+    """
+    index_dir: str
+    _file: Any
+    _block: List[Dict[str, Any]]
+    _block_bytes: int
+    _block_count: int
+    _doc_ids: List[int]
+    _blocks: List[int]
+    _slots: List[int]
+    _offsets: List[int]
+    _executor: ThreadPoolExecutor
+    _pending: Deque[Future]
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self._file = open(os.path.join(index_dir, STORE_FILE), 'wb')
+        self._block = []
+        self._block_bytes = 0
+        self._block_count = 0
+        self._doc_ids = []
+        self._blocks = []
+        self._slots = []
+        self._offsets = [0]
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending = deque()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add(self, doc_id: int, record: Dict[str, Any]) -> None:
+        stored = {field: record[field] for field in STORED_FIELDS if field in record}
+        self._doc_ids.append(doc_id)
+        self._blocks.append(self._block_count)
+        self._slots.append(len(self._block))
+        self._block.append(stored)
+        self._block_bytes += len(stored.get('title', '')) + len(stored.get('text', ''))
+        if self._block_bytes >= BLOCK_BYTES or len(self._block) >= MAX_BLOCK_DOCS:
+            self._flush_block()
+
+    def _flush_block(self) -> None:
+        if not self._block:
+            return
+        data = json.dumps(self._block).encode()
+        self._pending.append(self._executor.submit(zlib.compress, data, COMPRESSION_LEVEL))
+        self._block = []
+        self._block_bytes = 0
+        self._block_count += 1
+        while len(self._pending) > MAX_PENDING_BLOCKS:
+            self._write(self._pending.popleft().result())
+
+    def _write(self, compressed: bytes) -> None:
+        self._file.write(compressed)
+        self._offsets.append(self._offsets[-1] + len(compressed))
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._flush_block()
+        while self._pending:
+            self._write(self._pending.popleft().result())
+        self._executor.shutdown()
+        self._file.close()
+
+        order = np.argsort(np.array(self._doc_ids, dtype=np.int32), kind='stable')
+        np.savez(os.path.join(self.index_dir, OFFSETS_FILE),
+                 doc_ids=np.array(self._doc_ids, dtype=np.int32)[order],
+                 blocks=np.array(self._blocks, dtype=np.int32)[order],
+                 slots=np.array(self._slots, dtype=np.uint16)[order],
+                 offsets=np.array(self._offsets, dtype=np.int64))
+
+
+class DocStore:
+    """Random access to the records of a DocStoreWriter.
+
+    A lookup costs one binary search in the doc-ID table and, unless the
+    block is among the `cache_blocks` most recently used, one read and
+    decompression of its block from the memory-mapped store.
+    """
+    _file: Any
+    _map: mmap.mmap | None
+    _doc_ids: np.ndarray
+    _blocks: np.ndarray
+    _slots: np.ndarray
+    _offsets: np.ndarray
+    _cache: 'OrderedDict[int, List[Dict[str, Any]]]'
+    cache_blocks: int
+
+    def __init__(self, index_dir: str, cache_blocks: int = CACHE_BLOCKS):
+        table = np.load(os.path.join(index_dir, OFFSETS_FILE))
+        self._doc_ids = table['doc_ids']
+        self._blocks = table['blocks']
+        self._slots = table['slots']
+        self._offsets = table['offsets']
+        path = os.path.join(index_dir, STORE_FILE)
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) \
+            if os.path.getsize(path) else None
+        self._cache = OrderedDict()
+        self.cache_blocks = cache_blocks
+
+    @staticmethod
+    def exists(index_dir: str) -> bool:
+        return os.path.exists(os.path.join(index_dir, OFFSETS_FILE))
+
+    @staticmethod
+    def remove(index_dir: str) -> None:
+        """Delete the store of an earlier build, so it is not read against new doc IDs."""
+        for name in (STORE_FILE, OFFSETS_FILE):
+            path = os.path.join(index_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _block(self, block: int, trace: QueryTrace | None = None) -> List[Dict[str, Any]]:
+        records = self._cache.get(block)
+        if records is not None:
+            self._cache.move_to_end(block)
+            return records
+        start, end = int(self._offsets[block]), int(self._offsets[block + 1])
+        records = json.loads(zlib.decompress(self._map[start:end]))  # type: ignore
+        if trace is not None:
+            trace.count('docstore_blocks_read')
+            trace.count('docstore_bytes', end - start)
+        self._cache[block] = records
+        if len(self._cache) > self.cache_blocks:
+            self._cache.popitem(last=False)
+        return records
+
+    def get(self, doc_id: int, trace: QueryTrace | None = None) -> Dict[str, Any] | None:
+        k = int(np.searchsorted(self._doc_ids, doc_id))
+        if k == len(self._doc_ids) or self._doc_ids[k] != doc_id:
+            return None
+        return self._block(int(self._blocks[k]), trace)[int(self._slots[k])]
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
@@ -0,0 +1,77 @@
+import shutil
+import tempfile
+import unittest
+from . import doc_store
+from .doc_store import DocStoreWriter, DocStore
+from .snippet import snippet
+
+
+def normalize(word):
+    # drops stopwords and strips a plural "s", standing in for the stemmer
+    if word in ('the', 'of', 'a'):
+        return None
+    return word[:-1] if word.endswith('s') else word
+
+
+class TestDocStore(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.records = {doc_id: {'title': f"t{doc_id}", 'text': "w " * (doc_id % 50)}
+                        for doc_id in range(3000, 0, -3)}  # written out of order
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self):
+        with DocStoreWriter(self.dir) as writer:
+            for doc_id, rec in self.records.items():
+                writer.add(doc_id, dict(rec, id=doc_id, keywords=['dropped']))
+
+    def test_round_trip_over_many_blocks(self):
+        block_bytes = doc_store.BLOCK_BYTES
+        doc_store.BLOCK_BYTES = 256
+        try:
+            self.write()
+        finally:
+            doc_store.BLOCK_BYTES = block_bytes
+        store = DocStore(self.dir, cache_blocks=2)
+        self.assertGreater(len(store._offsets), 10)
+        for doc_id, rec in self.records.items():
+            self.assertEqual(store.get(doc_id), rec)
+        self.assertLessEqual(len(store._cache), 2)
+        self.assertIsNone(store.get(2))
+        self.assertIsNone(store.get(10 ** 6))
+        store.close()
+
+    def test_remove(self):
+        self.write()
+        DocStore.remove(self.dir)
+        self.assertFalse(DocStore.exists(self.dir))
+        DocStore.remove(self.dir)  # nothing left to remove
+
+    def test_empty_store(self):
+        DocStoreWriter(self.dir).close()
+        self.assertTrue(DocStore.exists(self.dir))
+        self.assertIsNone(DocStore(self.dir).get(1))
+
+
+class TestSnippet(unittest.TestCase):
+    def test_window_with_most_distinct_terms(self):
+        text = ("cats " + "filler " * 40 + "Dogs and cats, together. " + "filler " * 40)
+        out = snippet(text, {'dog', 'cat'}, normalize, words=10)
+        self.assertTrue(out.startswith('... '))
+        self.assertIn('<b>Dogs</b> and <b>cats</b>, together.', out)
+        self.assertTrue(out.endswith(' ...'))
+
+    def test_short_text_and_no_hits(self):
+        self.assertEqual(snippet("The  cat\nsat.", {'cat'}, normalize), "The <b>cat</b> sat.")
+        self.assertEqual(snippet("one two three", {'x'}, normalize, words=2), "one two ...")
+        self.assertEqual(snippet("", {'x'}, normalize), "")
+
+    def test_markup_is_escaped(self):
+        out = snippet('a <img src=x onerror=alert(1)> cat & "dog"', {'cat'}, normalize)
+        self.assertEqual(out, 'a &lt;img src=x onerror=alert(1)&gt; <b>cat</b> &amp; &quot;dog&quot;')
+
+
+if __name__ == '__main__':
+    unittest.main()
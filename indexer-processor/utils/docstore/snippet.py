@@ -0,0 +1,59 @@
+from typing import Callable, Collection, Dict, List, Tuple
+import html
+import re
+
+WORD_PATTERN = re.compile(r"\w+")
+SNIPPET_WORDS = 30
+# words of context kept before the first highlighted word
+LEAD_WORDS = 5
+HIGHLIGHT = ('<b>', '</b>')
+
+
+def snippet(text: str, terms: Collection[str], normalize: Callable[[str], str | None],
+            words: int = SNIPPET_WORDS) -> str:
+    """The `words`-word window of `text` with the most distinct query terms, highlighted.
+
+    Each word is mapped to its index term with `normalize` (lowercase in,
+    None for stopwords) so that "Running" highlights a query for "run".
+    Ties go to the window with more hits, then to the earliest one. The
+    result is HTML: everything but the highlight tags is escaped.
+    """
+    matches = list(WORD_PATTERN.finditer(text))
+    if not matches:
+        return ''
+    seen: Dict[str, str | None] = {}
+    hits: List[Tuple[int, str]] = []
+    for i, match in enumerate(matches):
+        word = match.group().lower()
+        if word not in seen:
+            seen[word] = normalize(word)
+        term = seen[word]
+        if term is not None and term in terms:
+            hits.append((i, term))
+
+    best_start, best_key = 0, (0, 0)
+    for a, (i, _) in enumerate(hits):
+        window_terms = set()
+        count = 0
+        for j, term in hits[a:]:
+            if j >= i + words:
+                break
+            window_terms.add(term)
+            count += 1
+        if (len(window_terms), count) > best_key:
+            best_key, best_start = (len(window_terms), count), i
+
+    start = max(0, min(best_start - LEAD_WORDS, len(matches) - words))
+    end = min(len(matches), start + words)
+    highlighted = {i for i, _ in hits if start <= i < end}
+    pieces = ['... ' if start > 0 else html.escape(text[:matches[0].start()])]
+    for i in range(start, end):
+        match = matches[i]
+        if i > start:
+            pieces.append(html.escape(text[matches[i - 1].end():match.start()]))
+        if i in highlighted:
+            pieces.append(HIGHLIGHT[0] + html.escape(match.group()) + HIGHLIGHT[1])
+        else:
+            pieces.append(html.escape(match.group()))
+    pieces.append(' ...' if end < len(matches) else html.escape(text[matches[-1].end():]))
+    return ' '.join(''.join(pieces).split())
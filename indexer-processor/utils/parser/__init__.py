@@ -1 +1,2 @@
 from .record_parser import *
+from .query_parser import *
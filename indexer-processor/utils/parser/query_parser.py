@@ -0,0 +1,235 @@
+from typing import Callable, List, Tuple
+import re
+
+MUST = '+'
+SHOULD = ''
+MUST_NOT = '-'
+
+OPERATORS = {'AND', 'OR', 'NOT'}
+# a quoted phrase (the closing quote is optional), parentheses, a +/- prefix
+# glued to what follows it, or a word
+TOKEN_PATTERN = re.compile(r'"[^"]*"?|[()]|[+-](?=[^\s)+-])|[^\s()+\-"][^\s()]*')
+
+
+class TermNode:
+    term: str
+
+    def __init__(self, term: str):
+        self.term = term
+
+    def __eq__(self, other):
+        return isinstance(other, TermNode) and self.term == other.term
+
+    def __repr__(self):
+        return f"TermNode({self.term!r})"
+
+
+class PhraseNode:
+    """Docs containing the terms at their offsets from the first one.
+
+    Offsets default to consecutive positions; they are wider where the
+    analyzer dropped a stopword between two terms.
+    """
+    terms: List[str]
+    offsets: List[int]
+
+    def __init__(self, terms: List[str], offsets: List[int] | None = None):
+        self.terms = terms
+        self.offsets = offsets if offsets is not None else list(range(len(terms)))
+
+    def __eq__(self, other):
+        return (isinstance(other, PhraseNode) and self.terms == other.terms
+                and self.offsets == other.offsets)
+
+    def __repr__(self):
+        return f"PhraseNode({self.terms!r}, {self.offsets!r})"
+
+
+class BooleanNode:
+    """Docs matching every `must` and no `must_not` node.
+
+    Without `must` nodes, docs matching any `should` node; with them,
+    `should` nodes only add to the score.
+    """
+    must: List['Node']
+    should: List['Node']
+    must_not: List['Node']
+
+    def __init__(self, must: List['Node'] | None = None, should: List['Node'] | None = None,
+                 must_not: List['Node'] | None = None):
+        self.must = must or []
+        self.should = should or []
+        self.must_not = must_not or []
+
+    def __eq__(self, other):
+        return (isinstance(other, BooleanNode) and self.must == other.must
+                and self.should == other.should and self.must_not == other.must_not)
+
+    def __repr__(self):
+        return f"BooleanNode(must={self.must}, should={self.should}, must_not={self.must_not})"
+
+
+Node = TermNode | PhraseNode | BooleanNode
+
+
+def disjunctive_terms(node: Node) -> List[str] | None:
+    """The terms of a plain OR of terms, in query order, or None for anything else."""
+    if isinstance(node, TermNode):
+        return [node.term]
+    if isinstance(node, PhraseNode) or node.must or node.must_not:
+        return None
+    terms: List[str] = []
+    for child in node.should:
+        child_terms = disjunctive_terms(child)
+        if child_terms is None:
+            return None
+        terms.extend(child_terms)
+    return terms
+
+
+def positive_terms(node: Node) -> List[str]:
+    """Distinct terms that contribute to the score, i.e. not under a must_not."""
+    if isinstance(node, TermNode):
+        return [node.term]
+    if isinstance(node, PhraseNode):
+        return list(dict.fromkeys(node.terms))
+    terms: List[str] = []
+    for child in node.must + node.should:
+        for term in positive_terms(child):
+            if term not in terms:
+                terms.append(term)
+    return terms
+
+
+def all_terms(node: Node) -> List[str]:
+    if isinstance(node, TermNode):
+        return [node.term]
+    if isinstance(node, PhraseNode):
+        return list(dict.fromkeys(node.terms))
+    terms: List[str] = []
+    for child in node.must + node.should + node.must_not:
+        for term in all_terms(child):
+            if term not in terms:
+                terms.append(term)
+    return terms
+
+
+class QueryParser:
+    """Parses queries with AND, OR, NOT, +required and -excluded terms,
+    "quoted phrases" and parentheses.
+
+    Operators are uppercase, so lowercase "and"/"or"/"not" stay ordinary
+    (stop)words. Terms side by side are OR'ed, which keeps plain queries
+    disjunctive. NOT binds tighter than AND, which binds tighter than OR.
+    Every word goes through `analyzer` (the document tokenizer); words it
+    drops, such as stopwords, are removed from the query, and a word it
+    splits into several terms becomes an OR of them. Malformed input never
+    raises: dangling operators and unbalanced parentheses are ignored.
+
+    Phrases go through `positional_analyzer` when one is given, which also
+    returns each term's token position, so that phrase offsets skip the
+    dropped words like document positions do.
+    """
+    _analyzer: Callable[[str], List[str]]
+    _positional_analyzer: Callable[[str], List[Tuple[str, int]]] | None
+    _toks: List[str]
+    _pos: int
+
+    def __init__(self, analyzer: Callable[[str], List[str]],
+                 positional_analyzer: Callable[[str], List[Tuple[str, int]]] | None = None):
+        self._analyzer = analyzer
+        self._positional_analyzer = positional_analyzer
+        self._toks = []
+        self._pos = 0
+
+    def parse(self, query: str) -> Node | None:
+        self._toks = TOKEN_PATTERN.findall(query)
+        self._pos = 0
+        return self._parse_or(nested=False)
+
+    def _peek(self) -> str | None:
+        return self._toks[self._pos] if self._pos < len(self._toks) else None
+
+    def _parse_or(self, nested: bool) -> Node | None:
+        clauses: List[Tuple[str, Node]] = []
+        while True:
+            tok = self._peek()
+            if tok is None or (tok == ')' and nested):
+                break
+            if tok in (')', 'OR'):
+                self._pos += 1
+                continue
+            clause = self._parse_and()
+            if clause is not None:
+                clauses.append(clause)
+
+        node = BooleanNode()
+        for occur, child in clauses:
+            {MUST: node.must, SHOULD: node.should, MUST_NOT: node.must_not}[occur].append(child)
+        if not node.must and not node.must_not:
+            if not node.should:
+                return None
+            if len(node.should) == 1:
+                return node.should[0]
+        return node
+
+    def _parse_and(self) -> Tuple[str, Node] | None:
+        operands = [self._parse_unary()]
+        while self._peek() == 'AND':
+            self._pos += 1
+            operands.append(self._parse_unary())
+        operands = [op for op in operands if op is not None]
+        if len(operands) <= 1:
+            return operands[0] if operands else None
+
+        node = BooleanNode()
+        for occur, child in operands:
+            (node.must_not if occur == MUST_NOT else node.must).append(child)
+        return SHOULD, node
+
+    def _parse_unary(self) -> Tuple[str, Node] | None:
+        occur = SHOULD
+        tok = self._peek()
+        if tok in ('NOT', MUST_NOT):
+            occur = MUST_NOT
+            self._pos += 1
+        elif tok == MUST:
+            occur = MUST
+            self._pos += 1
+        node = self._parse_atom()
+        return (occur, node) if node is not None else None
+
+    def _phrase(self, text: str) -> Node | None:
+        if self._positional_analyzer is None:
+            terms = self._analyzer(text)
+            offsets = list(range(len(terms)))
+        else:
+            pairs = self._positional_analyzer(text)
+            terms = [term for term, _ in pairs]
+            offsets = [pos - pairs[0][1] for _, pos in pairs]
+        if len(terms) > 1:
+            return PhraseNode(terms, offsets)
+        return TermNode(terms[0]) if terms else None
+
+    def _parse_atom(self) -> Node | None:
+        tok = self._peek()
+        if tok is None or tok in (')', 'OR', 'AND'):
+            # a dangling operator; the caller skips or consumes the token
+            return None
+        self._pos += 1
+        if tok == '(':
+            node = self._parse_or(nested=True)
+            if self._peek() == ')':
+                self._pos += 1
+            return node
+        if tok.startswith('"'):
+            return self._phrase(tok.strip('"'))
+        if tok in OPERATORS or tok in (MUST, MUST_NOT):
+            # "NOT NOT x", "+-x": read the operand and ignore the extra operator
+            return self._parse_atom()
+        terms = self._analyzer(tok)
+        if not terms:
+            return None
+        if len(terms) == 1:
+            return TermNode(terms[0])
+        return BooleanNode(should=[TermNode(t) for t in terms])
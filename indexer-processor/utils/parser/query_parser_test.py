@@ -0,0 +1,96 @@
+import unittest
+from .query_parser import (QueryParser, TermNode, PhraseNode, BooleanNode,
+                           disjunctive_terms, positive_terms, all_terms)
+
+STOPWORDS = {'the', 'and', 'or', 'not', 'of'}
+
+
+def analyzer(word):
+    # lowercases, drops stopwords and splits on spaces and hyphens, like RecordParser
+    return [w for w in word.lower().replace('-', ' ').split() if w not in STOPWORDS]
+
+
+def positional_analyzer(text):
+    words = text.lower().replace('-', ' ').split()
+    return [(w, i) for i, w in enumerate(words) if w not in STOPWORDS]
+
+
+def T(term):
+    return TermNode(term)
+
+
+class TestQueryParser(unittest.TestCase):
+    def setUp(self):
+        self.parser = QueryParser(analyzer)
+
+    def parse(self, query):
+        return self.parser.parse(query)
+
+    def test_plain_query_is_disjunction(self):
+        node = self.parse("the Radiohead albums")
+        self.assertEqual(node, BooleanNode(should=[T('radiohead'), T('albums')]))
+        self.assertEqual(disjunctive_terms(node), ['radiohead', 'albums'])
+        self.assertEqual(disjunctive_terms(self.parse("a OR (b c)")), ['a', 'b', 'c'])
+        self.assertEqual(self.parse("single"), T('single'))
+
+    def test_lowercase_operators_are_words(self):
+        self.assertEqual(self.parse("cats and dogs"), BooleanNode(should=[T('cats'), T('dogs')]))
+
+    def test_and_binds_tighter_than_or(self):
+        self.assertEqual(self.parse("a AND b OR c"), BooleanNode(should=[
+            BooleanNode(must=[T('a'), T('b')]), T('c')]))
+
+    def test_not_and_prefixes(self):
+        self.assertEqual(self.parse("a AND NOT b"),
+                         BooleanNode(must=[T('a')], must_not=[T('b')]))
+        node = self.parse("+nolan movies -batman")
+        self.assertEqual(node, BooleanNode(must=[T('nolan')], should=[T('movies')],
+                                           must_not=[T('batman')]))
+        self.assertIsNone(disjunctive_terms(node))
+        self.assertEqual(positive_terms(node), ['nolan', 'movies'])
+        self.assertEqual(all_terms(node), ['nolan', 'movies', 'batman'])
+
+    def test_parentheses(self):
+        self.assertEqual(self.parse("+(physics OR chemistry) nobel"), BooleanNode(
+            must=[BooleanNode(should=[T('physics'), T('chemistry')])], should=[T('nobel')]))
+        self.assertEqual(self.parse("-(a b) c"), BooleanNode(
+            should=[T('c')], must_not=[BooleanNode(should=[T('a'), T('b')])]))
+
+    def test_phrases(self):
+        node = self.parse('"the Dark Knight" -batman')
+        self.assertEqual(node, BooleanNode(should=[PhraseNode(['dark', 'knight'])],
+                                           must_not=[T('batman')]))
+        self.assertIsNone(disjunctive_terms(node))
+        self.assertEqual(positive_terms(node), ['dark', 'knight'])
+        self.assertEqual(self.parse('+"new york" pizza'), BooleanNode(
+            must=[PhraseNode(['new', 'york'])], should=[T('pizza')]))
+        self.assertEqual(self.parse('"single"'), T('single'))
+        self.assertEqual(self.parse('"open ended'), PhraseNode(['open', 'ended']))
+        self.assertIsNone(self.parse('"the" ""'))
+
+    def test_phrase_offsets_skip_stopwords(self):
+        parser = QueryParser(analyzer, positional_analyzer)
+        self.assertEqual(parser.parse('"the bank of america"'),
+                         PhraseNode(['bank', 'america'], [0, 2]))
+        self.assertEqual(parser.parse('"new york"'), PhraseNode(['new', 'york']))
+        # without a positional analyzer, offsets are consecutive
+        self.assertEqual(self.parse('"bank of america"'), PhraseNode(['bank', 'america'], [0, 1]))
+
+    def test_hyphen_inside_word_is_not_exclusion(self):
+        self.assertEqual(self.parse("x-ray"), BooleanNode(should=[T('x'), T('ray')]))
+
+    def test_stopwords_dropped(self):
+        self.assertEqual(self.parse("+the -of cats"), T('cats'))
+        self.assertIsNone(self.parse("the of"))
+
+    def test_malformed_input(self):
+        for query in ["", "AND", "a AND", "OR OR b", "(a", "a)", ")(", "NOT", "- + a",
+                      "((a AND) OR", "NOT NOT a", "+", "a ( ) b"]:
+            self.parse(query)  # must not raise
+        self.assertEqual(self.parse("(a b"), BooleanNode(should=[T('a'), T('b')]))
+        self.assertEqual(self.parse("a) b"), BooleanNode(should=[T('a'), T('b')]))
+        self.assertEqual(self.parse("OR a"), T('a'))
+
+
+if __name__ == '__main__':
+    unittest.main()
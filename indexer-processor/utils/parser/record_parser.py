@@ -1,10 +1,13 @@
-from typing import Set, Any, Dict, List
+from typing import Set, Any, Dict, List, Tuple
 import re
 import nltk
 
 
 nltk.download('stopwords', quiet=True)
 
+# positions skipped between the title and the text, so phrases never span both
+FIELD_GAP = 100
+
 
 class RecordParser:
     _stemmer: nltk.stem.StemmerI
@@ -24,3 +27,25 @@ class RecordParser:
             self._stemmer.stem(tok) for tok in tokens if not tok in self._stopwords
         ]  # type: ignore
         return processed
+
+    def parse_positions(self, record: Dict[str, Any]) -> List[Tuple[str, int]]:
+        """The terms of `parse`, each with its position among all tokens.
+
+        Stopwords keep their positions, so a phrase does not match across a
+        removed word, and the text starts FIELD_GAP positions after the title.
+        """
+        terms: List[Tuple[str, int]] = []
+        offset = 0
+        for field in ('title', 'text'):
+            tokens: List[str] = self._token_pattern.findall(record.get(field, '').lower())
+            for i, tok in enumerate(tokens):
+                if tok not in self._stopwords:
+                    terms.append((self._stemmer.stem(tok), offset + i))  # type: ignore
+            offset += len(tokens) + FIELD_GAP
+        return terms
+
+    def normalize(self, token: str) -> str | None:
+        """Index term of a single lowercase token, or None for a stopword."""
+        if token in self._stopwords:
+            return None
+        return self._stemmer.stem(token)
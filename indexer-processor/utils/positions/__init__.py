@@ -0,0 +1,2 @@
+from .varint import *
+from .positions import *
@@ -0,0 +1,120 @@
+from typing import List, Dict, Any
+import mmap
+import os
+import numpy as np
+from .varint import encode_varint, decode_varint, decode_positions, skip_varints
+
+# docs per skip block: finding a doc's positions decodes at most this many gap lists
+BLOCK_DOCS = 64
+
+
+def encode_term_positions(doc_positions: List[bytes]) -> bytes:
+    """Lay out one term's encoded position lists, in ascending doc order.
+
+    The block starts with the number of skip blocks and the byte length of
+    each, followed by the position lists themselves. A reader can jump to
+    the skip block of any doc and only walk the docs before it in that
+    block.
+    """
+    blocks = [b''.join(doc_positions[i:i + BLOCK_DOCS])
+              for i in range(0, len(doc_positions), BLOCK_DOCS)]
+    header = bytearray()
+    encode_varint(len(blocks), header)
+    for block in blocks:
+        encode_varint(len(block), header)
+    return bytes(header) + b''.join(blocks)
+
+
+class TermPositions:
+    """Positions of one term, decoded per doc on demand."""
+    doc_ids: np.ndarray
+    freqs: np.ndarray
+    _buf: bytes
+    _block_starts: List[int]
+
+    def __init__(self, buf: bytes, doc_ids: np.ndarray, freqs: np.ndarray):
+        self._buf = buf
+        self.doc_ids = doc_ids
+        self.freqs = freqs
+        count, offset = decode_varint(buf, 0)
+        lengths = []
+        for _ in range(count):
+            length, offset = decode_varint(buf, offset)
+            lengths.append(length)
+        self._block_starts = []
+        for length in lengths:
+            self._block_starts.append(offset)
+            offset += length
+
+    def get(self, doc_id: int) -> List[int]:
+        """Ascending positions of the term in `doc_id`, empty when it does not occur."""
+        k = int(np.searchsorted(self.doc_ids, doc_id))
+        if k == len(self.doc_ids) or self.doc_ids[k] != doc_id:
+            return []
+        offset = self._block_starts[k // BLOCK_DOCS]
+        for j in range(k - k % BLOCK_DOCS, k):
+            offset = skip_varints(self._buf, offset, int(self.freqs[j]))
+        return decode_positions(self._buf, offset, int(self.freqs[k]))[0]
+
+
+class PositionsFile:
+    """Memory-mapped positions.bin; term regions are located through the lexicon."""
+    path: str
+    _file: Any
+    _map: mmap.mmap | None
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = None
+        if os.path.getsize(path):
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def term(self, entry: Dict[str, Any], postings: Dict[int, int]) -> TermPositions:
+        doc_ids = np.array(sorted(postings), dtype=np.int32)
+        freqs = np.array([postings[doc] for doc in doc_ids.tolist()], dtype=np.int32)
+        start = entry['pos_offset']
+        # an empty file has no terms, so there is nothing to map
+        buf = self._map[start:start + entry['pos_length']]  # type: ignore
+        return TermPositions(buf, doc_ids, freqs)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+def phrase_count(position_lists: List[List[int]], offsets: List[int] | None = None) -> int:
+    """Occurrences of the terms at `offsets` from a common start, by default
+    at consecutive positions in list order.
+
+    Anchors on the shortest list and probes the others as sets.
+    """
+    if not position_lists or any(not p for p in position_lists):
+        return 0
+    if offsets is None:
+        offsets = list(range(len(position_lists)))
+    anchor = min(range(len(position_lists)), key=lambda i: len(position_lists[i]))
+    others = [(offsets[i], set(p)) for i, p in enumerate(position_lists) if i != anchor]
+    count = 0
+    for pos in position_lists[anchor]:
+        start = pos - offsets[anchor]
+        if all(start + offset in positions for offset, positions in others):
+            count += 1
+    return count
+
+
+def min_distance(a: List[int], b: List[int]) -> int | None:
+    """Smallest |i - j| over i in a and j in b, both ascending; None if either is empty."""
+    if not a or not b:
+        return None
+    i = j = 0
+    best = abs(a[0] - b[0])
+    while i < len(a) and j < len(b):
+        best = min(best, abs(a[i] - b[j]))
+        if a[i] < b[j]:
+            i += 1
+        else:
+            j += 1
+    return best
@@ -0,0 +1,57 @@
+import random
+import unittest
+import numpy as np
+from .varint import encode_positions, decode_positions, skip_varints
+from .positions import encode_term_positions, TermPositions, phrase_count, min_distance, BLOCK_DOCS
+
+
+class TestVarint(unittest.TestCase):
+    def test_round_trip(self):
+        positions = [0, 1, 127, 128, 300, 16384, 2 ** 31]
+        buf = b'\xff' + encode_positions(positions)
+        decoded, end = decode_positions(buf, 1, len(positions))
+        self.assertEqual(decoded, positions)
+        self.assertEqual(end, len(buf))
+        self.assertEqual(skip_varints(buf, 1, len(positions)), len(buf))
+
+    def test_small_gaps_take_one_byte(self):
+        self.assertEqual(len(encode_positions(list(range(0, 1000, 7)))), 143)
+
+
+class TestTermPositions(unittest.TestCase):
+    def test_get_across_blocks(self):
+        rng = random.Random(5)
+        doc_ids = sorted(rng.sample(range(100000), 3 * BLOCK_DOCS + 5))
+        lists = {doc: sorted(rng.sample(range(5000), rng.randint(1, 20))) for doc in doc_ids}
+        buf = encode_term_positions([encode_positions(lists[doc]) for doc in doc_ids])
+        tp = TermPositions(buf, np.array(doc_ids, dtype=np.int32),
+                           np.array([len(lists[doc]) for doc in doc_ids], dtype=np.int32))
+        for doc in rng.sample(doc_ids, 50) + [doc_ids[0], doc_ids[-1]]:
+            self.assertEqual(tp.get(doc), lists[doc])
+        self.assertEqual(tp.get(100001), [])
+        self.assertEqual(tp.get(-1), [])
+
+
+class TestMatching(unittest.TestCase):
+    def test_phrase_count(self):
+        # "new york new york" at 3..6, "new" alone at 10
+        self.assertEqual(phrase_count([[3, 5, 10], [4, 6]]), 2)
+        self.assertEqual(phrase_count([[4, 6], [3, 5, 10]]), 1)  # york new
+        self.assertEqual(phrase_count([[1], [2], [4]]), 0)
+        self.assertEqual(phrase_count([[1], []]), 0)
+
+    def test_phrase_count_with_offsets(self):
+        # "bank of america" with "of" dropped: america two positions after bank
+        self.assertEqual(phrase_count([[3, 20], [5, 21]], [0, 2]), 1)
+        self.assertEqual(phrase_count([[20], [21]], [0, 2]), 0)
+        # the anchor is the shortest list, not the first term
+        self.assertEqual(phrase_count([[1, 8, 30], [3], [4, 10]], [0, 2, 3]), 1)
+
+    def test_min_distance(self):
+        self.assertEqual(min_distance([1, 10, 20], [14, 30]), 4)
+        self.assertEqual(min_distance([50], [1, 2, 49]), 1)
+        self.assertIsNone(min_distance([], [1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+from typing import List, Tuple
+
+
+def encode_varint(value: int, out: bytearray) -> None:
+    """Append `value` as 7-bit groups, low first, with the high bit set on all but the last."""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def encode_positions(positions: List[int]) -> bytes:
+    """Ascending positions as varint gaps, the first one relative to 0."""
+    out = bytearray()
+    prev = 0
+    for pos in positions:
+        encode_varint(pos - prev, out)
+        prev = pos
+    return bytes(out)
+
+
+def decode_varint(buf: bytes, offset: int) -> Tuple[int, int]:
+    """Decode one varint at `offset`; returns it and the offset after it."""
+    value = 0
+    shift = 0
+    while True:
+        byte = buf[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def decode_positions(buf: bytes, offset: int, count: int) -> Tuple[List[int], int]:
+    """Decode `count` gap-encoded positions starting at `offset`; returns them and the end offset."""
+    positions: List[int] = []
+    pos = 0
+    for _ in range(count):
+        value = 0
+        shift = 0
+        while True:
+            byte = buf[offset]
+            offset += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        pos += value
+        positions.append(pos)
+    return positions, offset
+
+
+def skip_varints(buf: bytes, offset: int, count: int) -> int:
+    """Offset just past the next `count` varints."""
+    while count:
+        if buf[offset] < 0x80:
+            count -= 1
+        offset += 1
+    return offset
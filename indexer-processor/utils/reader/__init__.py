@@ -1 +1,3 @@
 from .reader import *
+from .bulk_reader import *
+from .warc_reader import *
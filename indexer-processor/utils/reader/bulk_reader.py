@@ -0,0 +1,135 @@
+from typing import Optional, BinaryIO, Dict, Any, List, Tuple, Sequence
+import threading
+import json
+import os
+
+BUFFER_SIZE = 4 * 1024 * 1024
+
+
+def split_ranges(path: str, parts: int) -> List[Tuple[int, int]]:
+    """Split a file into `parts` byte ranges of about the same size.
+
+    Ranges need not fall on line boundaries: a BulkReader over [start, end)
+    reads exactly the lines starting inside it, so readers over adjacent
+    ranges together read every line once.
+    """
+    size = os.path.getsize(path)
+    bounds = [size * i // parts for i in range(parts + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+class BulkReader:
+    """JSONL reader that reads large buffers and decodes whole batches at once.
+
+    Drop-in for Reader, plus `next_batch`, byte-range slicing for parallel
+    consumers and an optional projection onto a subset of the fields.
+    """
+    filePath: str
+    start: int
+    end: int | None
+    fields: Sequence[str] | None
+    buffer_size: int
+    _lock: threading.Lock
+    _file: BinaryIO | None
+    _pending: List[Dict[str, Any]]
+    _next: int
+    _tail: bytes
+    _pos: int
+    _done: bool
+
+    def __init__(self, path: str, start: int = 0, end: int | None = None,
+                 fields: Sequence[str] | None = None, buffer_size: int = BUFFER_SIZE):
+        self.filePath = path
+        self.start = start
+        self.end = end
+        self.fields = fields
+        self.buffer_size = buffer_size
+        self._file = None
+        self._lock = threading.Lock()
+        self._pending = []
+        self._next = 0
+        self._tail = b''
+        self._pos = 0
+        self._done = False
+
+    def __enter__(self):
+        with self._lock:
+            self._open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _open(self):
+        if self._file is not None:
+            return
+        self._file = open(self.filePath, 'rb')
+        self._pos = self.start
+        if self.start > 0:
+            # skip the line that started before the range
+            self._file.seek(self.start - 1)
+            self._pos = self.start - 1 + len(self._file.readline())
+
+    def _decode(self, lines: List[bytes]) -> List[Dict[str, Any]]:
+        # one decoder call for the whole batch instead of one per line
+        try:
+            records = json.loads(b'[' + b','.join(lines) + b']')
+        except json.JSONDecodeError:
+            records = [json.loads(line) for line in lines]
+        if self.fields is not None:
+            records = [{k: rec[k] for k in self.fields if k in rec}
+                       for rec in records]
+        return records
+
+    def _fill(self) -> bool:
+        """Read and decode the next buffer. Returns False once the range is exhausted."""
+        if self._done:
+            return False
+        chunk = self._file.read(self.buffer_size)  # type: ignore
+        data = self._tail + chunk
+        lines = data.split(b'\n')
+        if chunk:
+            self._tail = lines.pop()
+        else:
+            self._tail = b''
+            self._done = True
+
+        consumed = len(data) - len(self._tail)
+        if self.end is not None and self.end - self._pos <= consumed:
+            # lines starting before the cutoff: the first, plus one per newline before it
+            cutoff = self.end - self._pos
+            lines = lines[:data.count(b'\n', 0, cutoff - 1) + 1] if cutoff > 0 else []
+            self._done = True
+        self._pos += consumed
+
+        if not all(lines):
+            lines = [line for line in lines if line]
+        if lines:
+            self._pending = self._pending[self._next:] + self._decode(lines)
+            self._next = 0
+        return True
+
+    def next_line(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._open()
+            while self._next >= len(self._pending):
+                if not self._fill():
+                    return None
+            rec = self._pending[self._next]
+            self._next += 1
+            return rec
+
+    def next_batch(self, size: int) -> List[Dict[str, Any]]:
+        """Return up to `size` records, or an empty list at the end of the range."""
+        with self._lock:
+            self._open()
+            while len(self._pending) - self._next < size and self._fill():
+                pass
+            batch = self._pending[self._next:self._next + size]
+            self._next += len(batch)
+            return batch
+
+    def close(self):
+        with self._lock:
+            if self._file and not self._file.closed:
+                self._file.close()
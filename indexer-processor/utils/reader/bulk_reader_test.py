@@ -0,0 +1,65 @@
+import os
+import json
+import tempfile
+import unittest
+from . import reader_test
+from .bulk_reader import BulkReader, split_ranges
+
+
+class TestBulkReaderCompat(reader_test.TestReader):
+    # runs every Reader test against BulkReader
+    reader_cls = BulkReader
+
+
+class TestBulkReader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.NamedTemporaryFile(mode='w+', delete=False)
+        self.records = [
+            {"id": i, "title": f"t{i}", "text": "x" * (i % 7), "keywords": [i]}
+            for i in range(100)
+        ]
+        for rec in self.records:
+            self.tmp.write(json.dumps(rec) + "\n")
+        self.tmp.close()
+        self.path = self.tmp.name
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def read_all(self, rdr):
+        out = []
+        while True:
+            batch = rdr.next_batch(16)
+            if not batch:
+                break
+            self.assertLessEqual(len(batch), 16)
+            out.extend(batch)
+        return out
+
+    def test_small_buffers_split_lines(self):
+        # lines straddle buffer boundaries
+        with BulkReader(self.path, buffer_size=10) as rdr:
+            self.assertEqual(self.read_all(rdr), self.records)
+
+    def test_ranges_cover_every_line_once(self):
+        for parts in (1, 2, 3, 7, 50):
+            out = []
+            for start, end in split_ranges(self.path, parts):
+                with BulkReader(self.path, start, end, buffer_size=64) as rdr:
+                    out.extend(self.read_all(rdr))
+            self.assertEqual(out, self.records)
+
+    def test_fields_projection(self):
+        with BulkReader(self.path, fields=('id', 'title', 'text')) as rdr:
+            first = rdr.next_line()
+        self.assertEqual(first, {"id": 0, "title": "t0", "text": ""})
+
+    def test_missing_trailing_newline(self):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({"id": 100}))
+        with BulkReader(self.path) as rdr:
+            self.assertEqual(self.read_all(rdr)[-1], {"id": 100})
+
+
+if __name__ == '__main__':
+    unittest.main()
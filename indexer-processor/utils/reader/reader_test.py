@@ -7,6 +7,8 @@ from .reader import Reader
 
 
 class TestReader(unittest.TestCase):
+    reader_cls = Reader
+
     def setUp(self):
         self.tmp = tempfile.NamedTemporaryFile(mode='w+', delete=False)
         self.records = [
@@ -25,7 +27,7 @@ class TestReader(unittest.TestCase):
 
     def test_context_manager_and_eof(self):
         # Using 'with' should open and close automatically
-        with Reader(self.path) as rdr:
+        with self.reader_cls(self.path) as rdr:
             out = []
             while True:
                 rec = rdr.next_line()
@@ -38,7 +40,7 @@ class TestReader(unittest.TestCase):
 
     def test_lazy_opening(self):
         # Calling next_line() before 'with' should still open file
-        rdr = Reader(self.path)
+        rdr = self.reader_cls(self.path)
         first = rdr.next_line()
         self.assertEqual(first, self.records[0])
         # Continue reading to end
@@ -51,7 +53,7 @@ class TestReader(unittest.TestCase):
         self.assertTrue(rdr._file.closed) # type: ignore
 
     def test_close_idempotent(self):
-        rdr = Reader(self.path)
+        rdr = self.reader_cls(self.path)
         rdr.__enter__()
         rdr.close()
         # second close() should not error
@@ -61,7 +63,7 @@ class TestReader(unittest.TestCase):
 
     def test_thread_safety(self):
         # In a multithreaded scenario, all records are read exactly once
-        with Reader(self.path) as rdr:
+        with self.reader_cls(self.path) as rdr:
             results = []
             lock = threading.Lock()
 
@@ -86,7 +88,7 @@ class TestReader(unittest.TestCase):
         # Empty file should immediately return None
         empty = tempfile.NamedTemporaryFile(mode='w+', delete=False)
         empty.close()
-        with Reader(empty.name) as rdr:
+        with self.reader_cls(empty.name) as rdr:
             self.assertIsNone(rdr.next_line())
         os.remove(empty.name)
 
@@ -0,0 +1,170 @@
+from typing import Optional, Dict, Any, Iterator, List, Deque, Set, Tuple
+from collections import deque
+import itertools
+import multiprocessing
+import multiprocessing.pool
+import threading
+import os
+import re
+from bs4 import BeautifulSoup
+from bs4 import XMLParsedAsHTMLWarning
+from warcio.archiveiterator import ArchiveIterator
+import warnings
+
+warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+
+WARC_FILE_PATTERN = re.compile(r"^crawl_(\d+)\.warc$")
+# MIME type of revisit records in the crawler's CDX sidecars
+REVISIT_MIME = 'warc/revisit'
+
+
+def _read_sidecar(path: str) -> List[str | None] | None:
+    """URLs of the response records of a WARC file, in record order, from its
+    CDX sidecar, or None without one.
+    """
+    cdx_path = path[:-len('.warc')] + '.cdx'
+    if not os.path.exists(cdx_path):
+        return None
+    urls: List[str | None] = []
+    with open(cdx_path) as f:
+        for line in f:
+            fields = line.split()
+            # the header line starts with a space, and so has "CDX" first
+            if len(fields) < 3 or fields[0] == 'CDX' or fields[2] == REVISIT_MIME:
+                continue
+            urls.append(fields[0])
+    return urls
+
+
+def _scan_file(path: str) -> List[str | None]:
+    """Target URIs of the response records of a WARC file, in record order.
+
+    Decompresses the whole file, so it is only used when the sidecar is missing.
+    """
+    with open(path, 'rb') as f:
+        return [record.rec_headers.get_header('WARC-Target-URI')
+                for record in ArchiveIterator(f) if record.rec_type == 'response']
+
+
+def _extract_file(path: str, keep: Set[int]) -> List[Dict[str, Any]]:
+    """Decode the response records numbered in `keep` into title/text records."""
+    records: List[Dict[str, Any]] = []
+    with open(path, 'rb') as f:
+        responses = (record for record in ArchiveIterator(f) if record.rec_type == 'response')
+        for i, record in enumerate(responses):
+            if i not in keep:
+                continue
+            url = record.rec_headers.get_header('WARC-Target-URI')
+            soup = BeautifulSoup(record.content_stream().read(), 'html.parser')
+            title = soup.title.string.strip() if soup.title and soup.title.string else ''
+            for element in soup(['script', 'style', 'noscript']):
+                element.extract()
+            text = soup.get_text(separator=' ', strip=True)
+            records.append({'url': url, 'title': title, 'text': text})
+    return records
+
+
+class WarcReader:
+    """Reads documents straight from a directory of crawl_N.warc files.
+
+    A URL captured more than once, e.g. by a recrawl, is one document: the
+    latest capture, under the ID of the URL's first capture. The latest
+    captures are picked from the crawl_N.cdx sidecars; a file without one
+    has its record headers scanned first.
+    IDs number distinct URLs in order of first capture, so they stay stable
+    as long as no earlier file changes, and files appended by later crawls
+    only add IDs for new URLs.
+
+    Files are decoded in parallel by a process pool, a few files ahead of the
+    consumer, and documents come out in file and record order of their
+    latest capture.
+    """
+    dirPath: str
+    workers: int
+    _lock: threading.Lock
+    _pool: multiprocessing.pool.Pool | None
+    _docs: Iterator[Dict[str, Any]] | None
+
+    def __init__(self, path: str, workers: int | None = None):
+        self.dirPath = path
+        self.workers = workers or multiprocessing.cpu_count()
+        self._lock = threading.Lock()
+        self._pool = None
+        self._docs = None
+
+    def __enter__(self):
+        with self._lock:
+            self._open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _files(self) -> List[str]:
+        numbered = []
+        for name in os.listdir(self.dirPath):
+            match = WARC_FILE_PATTERN.match(name)
+            if match:
+                numbered.append((int(match.group(1)), name))
+        return [os.path.join(self.dirPath, name) for _, name in sorted(numbered)]
+
+    def _open(self):
+        if self._docs is None:
+            self._pool = multiprocessing.Pool(self.workers)
+            self._docs = self._stream(self._files())
+
+    def _stream(self, paths: List[str]) -> Iterator[Dict[str, Any]]:
+        ids: Dict[str, int] = {}
+        latest: Dict[str, Tuple[int, int]] = {}
+        file_urls: List[List[str | None] | None] = [_read_sidecar(path) for path in paths]
+        unindexed = [i for i, urls in enumerate(file_urls) if urls is None]
+        if unindexed:
+            scanned = self._pool.map(_scan_file, [paths[i] for i in unindexed])  # type: ignore
+            for i, urls in zip(unindexed, scanned):
+                file_urls[i] = urls
+        for file_no, urls in enumerate(file_urls):
+            for record_no, url in enumerate(urls):  # type: ignore
+                # a record without a URI cannot be matched to others, so it stands alone
+                url = url or f"#{file_no}:{record_no}"
+                ids.setdefault(url, len(ids))
+                latest[url] = (file_no, record_no)
+        # per file, the doc ID of each response record to decode
+        keep: List[Dict[int, int]] = [{} for _ in paths]
+        for url, (file_no, record_no) in latest.items():
+            keep[file_no][record_no] = ids[url]
+
+        # bounded prefetch, unlike Pool.imap which decodes every file eagerly
+        pending: Deque[Tuple[Dict[int, int], multiprocessing.pool.AsyncResult]] = deque()
+        jobs = iter(zip(paths, keep))
+        while True:
+            while self._pool is not None and len(pending) < 2 * self.workers:
+                job = next(jobs, None)
+                if job is None:
+                    break
+                path, doc_ids = job
+                pending.append((doc_ids, self._pool.apply_async(_extract_file, (path, set(doc_ids)))))
+            if not pending:
+                return
+            doc_ids, result = pending.popleft()
+            # records come back in record order
+            for record_no, rec in zip(sorted(doc_ids), result.get()):
+                rec['id'] = doc_ids[record_no]
+                yield rec
+
+    def next_line(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._open()
+            return next(self._docs, None)  # type: ignore
+
+    def next_batch(self, size: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._open()
+            return list(itertools.islice(self._docs, size))  # type: ignore
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool.join()
+                self._pool = None
+                self._docs = iter(())
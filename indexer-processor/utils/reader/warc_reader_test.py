@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import unittest
+from io import BytesIO
+from warcio.warcwriter import WARCWriter
+from warcio.statusandheaders import StatusAndHeaders
+from .warc_reader import WarcReader, _read_sidecar
+
+
+def write_warc(path, pages):
+    with open(path, 'wb') as f:
+        writer = WARCWriter(f, gzip=True)
+        for url, html in pages:
+            headers = StatusAndHeaders(
+                '200 OK', [('Content-Type', 'text/html')], protocol='HTTP/1.0')
+            writer.write_record(writer.create_warc_record(
+                url, 'response', payload=BytesIO(html.encode()), http_headers=headers))
+        writer.write_record(writer.create_warc_record(
+            'urn:meta', 'metadata', payload=BytesIO(b'ignored')))
+
+
+def write_sidecar(path, entries):
+    # the crawler's CDX layout: URL, timestamp, MIME type, status, length, offset, file
+    with open(path, 'w') as f:
+        f.write(" CDX a b m s S V g\n")
+        for url, mime in entries:
+            f.write(f"{url} 20240101000000 {mime} 200 100 0 {os.path.basename(path)}\n")
+
+
+class TestWarcReader(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        # crawl_10 sorts after crawl_2 numerically, not lexicographically
+        write_warc(os.path.join(self.dir, 'crawl_10.warc'), [
+            ('http://c', '<html><title>C</title><body>third</body></html>'),
+        ])
+        write_warc(os.path.join(self.dir, 'crawl_2.warc'), [
+            ('http://a', '<html><title>A</title><body>first<script>x()</script></body></html>'),
+            ('http://b', '<html><title>B</title><body>second</body></html>'),
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def read_all(self, rdr):
+        out = []
+        while True:
+            rec = rdr.next_line()
+            if rec is None:
+                break
+            out.append(rec)
+        return out
+
+    def test_records_in_file_order_with_stable_ids(self):
+        with WarcReader(self.dir, workers=2) as rdr:
+            out = self.read_all(rdr)
+        self.assertEqual([r['id'] for r in out], [0, 1, 2])
+        self.assertEqual([r['url'] for r in out], ['http://a', 'http://b', 'http://c'])
+        self.assertEqual(out[0]['title'], 'A')
+        self.assertEqual(out[0]['text'], 'A first')
+
+    def test_url_captured_twice_keeps_latest_capture_and_first_id(self):
+        # a recrawl captured http://a again, changed
+        write_warc(os.path.join(self.dir, 'crawl_11.warc'), [
+            ('http://a', '<html><title>A2</title><body>updated</body></html>'),
+            ('http://d', '<html><title>D</title><body>fourth</body></html>'),
+        ])
+        with WarcReader(self.dir, workers=2) as rdr:
+            out = self.read_all(rdr)
+        self.assertEqual([(r['url'], r['id']) for r in out],
+                         [('http://b', 1), ('http://c', 2), ('http://a', 0), ('http://d', 3)])
+        self.assertEqual(out[2]['text'], 'A2 updated')
+
+    def test_sidecar_lists_response_urls(self):
+        path = os.path.join(self.dir, 'crawl_11.warc')
+        self.assertIsNone(_read_sidecar(path))
+        write_sidecar(os.path.join(self.dir, 'crawl_11.cdx'), [
+            ('http://a', 'text/html'), ('http://b', 'warc/revisit'), ('http://d', '-')])
+        self.assertEqual(_read_sidecar(path), ['http://a', 'http://d'])
+
+    def test_latest_captures_from_sidecars(self):
+        write_warc(os.path.join(self.dir, 'crawl_11.warc'), [
+            ('http://a', '<html><title>A2</title><body>updated</body></html>'),
+            ('http://d', '<html><title>D</title><body>fourth</body></html>'),
+        ])
+        write_sidecar(os.path.join(self.dir, 'crawl_11.cdx'), [
+            ('http://b', 'warc/revisit'), ('http://a', 'text/html'), ('http://d', 'text/html')])
+        # crawl_2 has a sidecar too, crawl_10 is scanned
+        write_sidecar(os.path.join(self.dir, 'crawl_2.cdx'), [
+            ('http://a', 'text/html'), ('http://b', 'text/html')])
+        with WarcReader(self.dir, workers=2) as rdr:
+            out = self.read_all(rdr)
+        self.assertEqual([(r['url'], r['id'], r['title']) for r in out],
+                         [('http://b', 1, 'B'), ('http://c', 2, 'C'), ('http://a', 0, 'A2'), ('http://d', 3, 'D')])
+
+    def test_close_idempotent(self):
+        rdr = WarcReader(self.dir, workers=1)
+        self.assertEqual(rdr.next_line()['id'], 0)  # type: ignore
+        rdr.close()
+        rdr.close()
+        self.assertIsNone(rdr.next_line())
+
+    def test_empty_directory(self):
+        empty = tempfile.mkdtemp()
+        with WarcReader(empty, workers=1) as rdr:
+            self.assertIsNone(rdr.next_line())
+        os.rmdir(empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,2 @@
+from .query_trace import *
+from .aggregate import *
@@ -0,0 +1,20 @@
+import json
+import argparse
+from .aggregate import aggregate, read_traces
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Aggregate per-query traces written by processor.py")
+    parser.add_argument("traces", help="trace file, or processor output run with --trace",
+                        type=str, nargs='+')
+    parser.add_argument("-s", "--slowest", help="number of slowest queries to list",
+                        type=int, default=5, dest='slowest')
+    args = parser.parse_args()
+
+    traces = [t for path in args.traces for t in read_traces(path)]
+    print(json.dumps(aggregate(traces, args.slowest), indent=2))
+
+
+if __name__ == '__main__':
+    main()
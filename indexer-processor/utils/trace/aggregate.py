@@ -0,0 +1,79 @@
+from typing import Dict, List, Any, Iterable
+import json
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    index = max(0, int(round(pct / 100 * len(sorted_values))) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def _distribution(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    return {
+        'total_ms': round(sum(values), 3),
+        'mean_ms': round(sum(values) / len(values), 4),
+        'p50_ms': percentile(values, 50),
+        'p90_ms': percentile(values, 90),
+        'p99_ms': percentile(values, 99),
+        'max_ms': values[-1],
+    }
+
+
+def aggregate(traces: Iterable[Dict[str, Any]], slowest: int = 5) -> Dict[str, Any]:
+    """Summarize the traces of a query log.
+
+    Phases missing from a trace count as zero, so every phase distribution
+    covers all queries.
+    """
+    traces = list(traces)
+    if not traces:
+        return {'queries': 0}
+
+    phases = sorted({phase for t in traces for phase in t['phases_ms']})
+    totals = [t['total_ms'] for t in traces]
+    counters: Dict[str, int] = {}
+    for t in traces:
+        for name, n in t['counters'].items():
+            counters[name] = counters.get(name, 0) + n
+
+    summary: Dict[str, Any] = {
+        'queries': len(traces),
+        'latency': _distribution(totals),
+        'phases': {},
+        'counters': counters,
+        'counters_per_query': {name: round(n / len(traces), 2) for name, n in counters.items()},
+    }
+    for phase in phases:
+        dist = _distribution([t['phases_ms'].get(phase, 0.0) for t in traces])
+        dist['share'] = round(dist['total_ms'] / sum(totals), 4) if sum(totals) else 0.0
+        summary['phases'][phase] = dist
+
+    decoded = counters.get('postings_decoded', 0)
+    if decoded:
+        summary['skipped_fraction'] = round(counters.get('postings_skipped', 0) / decoded, 4)
+
+    summary['slowest'] = [
+        {
+            'Query': t['Query'],
+            'total_ms': t['total_ms'],
+            'dominant_phase': max(t['phases_ms'], key=t['phases_ms'].get, default=None),
+        }
+        for t in sorted(traces, key=lambda t: t['total_ms'], reverse=True)[:slowest]
+    ]
+    return summary
+
+
+def read_traces(path: str) -> List[Dict[str, Any]]:
+    """Traces from a trace file or from processor output run with --trace."""
+    traces = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            trace = entry.get('Trace', entry)
+            if 'phases_ms' in trace:
+                traces.append(trace)
+    return traces
+
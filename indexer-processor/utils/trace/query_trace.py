@@ -0,0 +1,47 @@
+from typing import Dict, List, Tuple, Any
+import time
+
+
+class QueryTrace:
+    """Phase timings and counters of a single query.
+
+    Instrumented code takes an optional trace and only touches it when one
+    is given, so an untraced query pays for a few `is not None` checks.
+    Phases are timed as laps: `lap(phase)` charges the time since the
+    previous lap to `phase`, so repeated phases (one read per term)
+    accumulate.
+    """
+    query: str
+    phases: Dict[str, float]
+    counters: Dict[str, int]
+    thresholds: List[Tuple[int, float]]
+    _start: float
+    _last: float
+
+    def __init__(self, query: str):
+        self.query = query
+        self.phases = {}
+        self.counters = {}
+        self.thresholds = []
+        self._start = self._last = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def threshold(self, value: float) -> None:
+        """Record a new heap threshold, tagged with the current pivot iteration."""
+        self.thresholds.append((self.counters.get('pivot_iterations', 0), value))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'Query': self.query,
+            'total_ms': round((self._last - self._start) * 1000, 4),
+            'phases_ms': {phase: round(sec * 1000, 4) for phase, sec in self.phases.items()},
+            'counters': dict(self.counters),
+            'thresholds': [[it, round(float(thr), 4)] for it, thr in self.thresholds],
+        }
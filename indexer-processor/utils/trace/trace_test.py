@@ -0,0 +1,67 @@
+import unittest
+from .query_trace import QueryTrace
+from .aggregate import aggregate, percentile
+from ..wand import WandTermPointer, wand_query
+
+
+def pointers():
+    common = {d: 1 for d in range(0, 1000)}
+    rare = {d: 3 for d in range(0, 1000, 100)}
+    return [WandTermPointer('common', common, 1.0), WandTermPointer('rare', rare, 15.0)]
+
+
+def score(term, freq, doc_id):
+    return {'common': 1.0, 'rare': 5.0}[term] * freq * (0.5 + doc_id / 2000)
+
+
+class TestQueryTrace(unittest.TestCase):
+    def test_laps_accumulate(self):
+        trace = QueryTrace('q')
+        trace.lap('read')
+        trace.lap('decode')
+        trace.lap('read')
+        trace.count('terms', 2)
+        trace.count('terms')
+        out = trace.to_dict()
+        self.assertEqual(set(out['phases_ms']), {'read', 'decode'})
+        self.assertEqual(out['counters'], {'terms': 3})
+        self.assertAlmostEqual(sum(out['phases_ms'].values()), out['total_ms'], places=2)
+
+    def test_wand_results_unchanged_by_tracing(self):
+        trace = QueryTrace('q')
+        self.assertEqual(wand_query(pointers(), 3, score),
+                         wand_query(pointers(), 3, score, trace))
+        counters = trace.counters
+        self.assertGreater(counters['pivot_iterations'], 0)
+        self.assertGreater(counters['postings_skipped'], 0)
+        # the rare term dominates, so most common-only documents are skipped
+        self.assertLess(counters['docs_scored'], 1000)
+        thresholds = [thr for _, thr in trace.thresholds]
+        self.assertEqual(thresholds, sorted(thresholds))
+
+
+class TestAggregate(unittest.TestCase):
+    def test_aggregate(self):
+        traces = [
+            {'Query': 'a', 'total_ms': 1.0, 'phases_ms': {'read': 1.0},
+             'counters': {'postings_decoded': 10, 'postings_skipped': 5}, 'thresholds': []},
+            {'Query': 'b', 'total_ms': 3.0, 'phases_ms': {'read': 1.0, 'wand': 2.0},
+             'counters': {'postings_decoded': 10}, 'thresholds': []},
+        ]
+        out = aggregate(traces, slowest=1)
+        self.assertEqual(out['queries'], 2)
+        self.assertEqual(out['phases']['wand']['p50_ms'], 0.0)
+        self.assertEqual(out['phases']['read']['share'], 0.5)
+        self.assertEqual(out['skipped_fraction'], 0.25)
+        self.assertEqual(out['slowest'], [{'Query': 'b', 'total_ms': 3.0, 'dominant_phase': 'wand'}])
+        self.assertEqual(aggregate([]), {'queries': 0})
+
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile([3.0], 90), 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1 +1,2 @@
 from .wand_ptr import *
+from .boolean import *
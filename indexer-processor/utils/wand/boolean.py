@@ -0,0 +1,51 @@
+import numpy as np
+from typing import List
+from .wand_ptr import DocCursor
+
+
+def intersect(cursors: List[DocCursor]) -> np.ndarray:
+    """Docs present in every cursor.
+
+    Leapfrogs from the shortest list: each candidate is looked up in the
+    others with galloping skip_to, and a miss moves the candidate to the
+    first doc the other list does have.
+    """
+    if not cursors:
+        return np.empty(0, dtype=np.int32)
+    cursors = sorted(cursors, key=lambda c: len(c.doc_ids))
+    lead, others = cursors[0], cursors[1:]
+    out: List[int] = []
+    while lead.has_next():
+        doc = lead.current_doc()
+        for cursor in others:
+            cursor.skip_to(doc)
+            if cursor.current_doc() != doc:
+                lead.skip_to(cursor.current_doc())
+                break
+        else:
+            out.append(int(doc))
+            lead.next()
+    return np.array(out, dtype=np.int32)
+
+
+def union(cursors: List[DocCursor]) -> np.ndarray:
+    if not cursors:
+        return np.empty(0, dtype=np.int32)
+    return np.unique(np.concatenate([c.doc_ids[c.index:] for c in cursors]))
+
+
+def exclude(candidates: np.ndarray, cursors: List[DocCursor]) -> np.ndarray:
+    """Candidates absent from every cursor.
+
+    Candidates are ascending, so each excluded list is walked once with
+    skip_to instead of materializing it as a set.
+    """
+    out: List[int] = []
+    for doc in candidates.tolist():
+        for cursor in cursors:
+            cursor.skip_to(doc)
+            if cursor.current_doc() == doc:
+                break
+        else:
+            out.append(doc)
+    return np.array(out, dtype=np.int32)
@@ -0,0 +1,56 @@
+import random
+import unittest
+import numpy as np
+from .wand_ptr import DocCursor
+from .boolean import intersect, union, exclude
+
+
+def cursor(ids):
+    return DocCursor(np.array(sorted(ids), dtype=np.int32))
+
+
+class TestDocCursor(unittest.TestCase):
+    def test_galloping_skip_matches_linear_scan(self):
+        rng = random.Random(1)
+        ids = sorted(rng.sample(range(10000), 500))
+        c = cursor(ids)
+        target = 0
+        while c.has_next():
+            target += rng.randint(0, 300)
+            c.skip_to(target)
+            expected = next((i for i, d in enumerate(ids) if d >= target), len(ids))
+            self.assertEqual(c.index, expected)
+
+    def test_skip_backwards_is_noop(self):
+        c = cursor([1, 5, 9])
+        c.skip_to(6)
+        c.skip_to(2)
+        self.assertEqual(c.current_doc(), 9)
+        c.skip_to(10)
+        self.assertFalse(c.has_next())
+
+
+class TestBooleanOps(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        self.lists = [set(rng.sample(range(5000), n)) for n in (40, 800, 2500)]
+
+    def test_intersect(self):
+        expected = sorted(set.intersection(*self.lists))
+        got = intersect([cursor(ids) for ids in reversed(self.lists)])
+        self.assertEqual(got.tolist(), expected)
+        self.assertEqual(intersect([cursor([1, 2]), cursor([])]).tolist(), [])
+        self.assertEqual(intersect([]).tolist(), [])
+
+    def test_union(self):
+        self.assertEqual(union([cursor(ids) for ids in self.lists]).tolist(),
+                         sorted(set.union(*self.lists)))
+
+    def test_exclude(self):
+        candidates = np.array(sorted(self.lists[1]), dtype=np.int32)
+        got = exclude(candidates, [cursor(self.lists[0]), cursor(self.lists[2])])
+        self.assertEqual(got.tolist(), sorted(self.lists[1] - self.lists[0] - self.lists[2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
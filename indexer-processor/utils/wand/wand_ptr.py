@@ -1,14 +1,14 @@
 import heapq
 import numpy as np
 from typing import List, Dict, Tuple
+from ..trace import QueryTrace
 
-class WandTermPointer:
-    def __init__(self, term: str, postings: Dict[int, int], upper_bound: float):
-        self.term = term
-        self.doc_ids = np.array(sorted(postings.keys()), dtype=np.int32)
-        self.freqs = np.array([postings[doc_id] for doc_id in self.doc_ids], dtype=np.int32)
+class DocCursor:
+    """Position in a sorted doc-ID array."""
+
+    def __init__(self, doc_ids: np.ndarray):
+        self.doc_ids = doc_ids
         self.index = 0
-        self.upper_bound = upper_bound
 
     def has_next(self) -> bool:
         return self.index < len(self.doc_ids)
@@ -16,22 +16,51 @@ class WandTermPointer:
     def current_doc(self) -> int:
         return self.doc_ids[self.index] if self.has_next() else np.iinfo(np.int32).max
 
-    def current_freq(self) -> int:
-        return self.freqs[self.index] if self.has_next() else 0
-
     def skip_to(self, doc_id: int):
-        while self.has_next() and self.current_doc() < doc_id:
-            self.index += 1
+        """Advance to the first doc >= doc_id.
+
+        Gallops ahead in doubling steps, then binary searches the last step,
+        so a skip over n postings costs O(log n) rather than O(n).
+        """
+        ids = self.doc_ids
+        i = self.index
+        n = len(ids)
+        if i >= n or ids[i] >= doc_id:
+            return
+        step = 1
+        while i + step < n and ids[i + step] < doc_id:
+            i += step
+            step *= 2
+        if step == 1:
+            # the next doc already qualifies, the common case for dense lists
+            self.index = i + 1
+            return
+        # ids[i] < doc_id, and the answer lies in (i, min(i + step, n)]
+        self.index = i + 1 + int(np.searchsorted(ids[i + 1:min(i + step, n)], doc_id))
 
     def next(self):
         self.index += 1
 
 
-def wand_query(pointers: List[WandTermPointer], k: int, score_fn) -> List[Tuple[float, int]]:
+class WandTermPointer(DocCursor):
+    def __init__(self, term: str, postings: Dict[int, int], upper_bound: float):
+        super().__init__(np.array(sorted(postings.keys()), dtype=np.int32))
+        self.term = term
+        self.freqs = np.array([postings[doc_id] for doc_id in self.doc_ids], dtype=np.int32)
+        self.upper_bound = upper_bound
+
+    def current_freq(self) -> int:
+        return self.freqs[self.index] if self.has_next() else 0
+
+
+def wand_query(pointers: List[WandTermPointer], k: int, score_fn,
+               trace: QueryTrace | None = None) -> List[Tuple[float, int]]:
     heap: List[Tuple[float, int]] = []  # (score, docId)
     threshold = 0.0
 
     while True:
+        if trace is not None:
+            trace.count('pivot_iterations')
         pointers.sort(key=lambda p: p.current_doc())
         pivot = -1
         score_upper = 0.0
@@ -55,14 +84,21 @@ def wand_query(pointers: List[WandTermPointer], k: int, score_fn) -> List[Tuple[
                 if ptr.current_doc() == doc_id:
                     ptr.next()
             score = np.sum([score_fn(term, freq, doc_id) for term, freq in term_freqs])
+            if trace is not None:
+                trace.count('docs_scored')
             if score > threshold:
                 heapq.heappush(heap, (score, doc_id))
                 if len(heap) > k:
                     heapq.heappop(heap)
                 threshold = heap[0][0]
+                if trace is not None:
+                    trace.threshold(threshold)
         else:
             for ptr in pointers[:pivot]:
+                skipped_from = ptr.index
                 ptr.skip_to(pivot_doc)
+                if trace is not None:
+                    trace.count('postings_skipped', ptr.index - skipped_from)
 
     return sorted(heap, reverse=True)
 